@@ -0,0 +1,4 @@
+"""
+File:           __init__.py
+Created on:     18/10/26, 8:09 pm
+"""
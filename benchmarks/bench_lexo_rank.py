@@ -0,0 +1,270 @@
+"""
+File:           bench_lexo_rank.py
+Created on:     18/10/26, 8:09 pm
+
+Benchmarks for the rank hot paths. Runs offline on deterministic workloads, prints the
+results as JSON and optionally compares them against a stored baseline. The workloads only
+use the API of the original implementation, so the same run works on old checkouts to
+record a baseline; benchmarks of newer APIs are skipped when the API is missing.
+
+Usage:
+    python -m benchmarks.bench_lexo_rank --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_lexo_rank --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from src.lexo_decimal import LexoDecimal
+from src.lexo_integer import LexoInteger
+from src.lexo_rank import LexoRank
+
+
+class Workloads:
+    """ Deterministic rank workloads shared by the benchmarks """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.short = Workloads._short_ranks(size)
+        self.long = Workloads._long_ranks(size, 100)
+        self.short_pairs = [
+            (LexoRank.parse(a), LexoRank.parse(b)) for a, b in zip(self.short, self.short[1:])
+        ]
+        self.long_pairs = [
+            (LexoRank.parse(a), LexoRank.parse(b)) for a, b in zip(self.long, self.long[1:])
+        ]
+        self.long_decimals = [LexoRank.parse(rank).decimal for rank in self.long]
+        self.decimal_strings = [rank.split("|")[1] for rank in self.long]
+        self.integers = [decimal.mag for decimal in self.long_decimals]
+
+    @staticmethod
+    def _short_ranks(size: int) -> List[str]:
+        """ Ranks as left by appending to a list """
+        ranks = []
+        rank = LexoRank.min()
+        for _ in range(size):
+            rank = rank.gen_next()
+            ranks.append(rank.value)
+        return ranks
+
+    @staticmethod
+    def _long_ranks(size: int, min_length: int) -> List[str]:
+        """
+        Ranks of at least min_length characters, as left by repeated inserts at one spot:
+        a long rank followed by distinct fixed width suffixes
+        """
+        left = LexoRank.middle()
+        right = left.gen_next()
+        while len(right.value) < min_length:
+            left, right = right, left.between(right)
+        system = LexoRank.NUMERAL_SYSTEM
+        base = system.get_base
+        ranks = []
+        for index in range(size):
+            # The last digit is never 0, a canonical fraction does not end with a zero
+            suffix = system.to_char(index // (base - 1) // base % base) + \
+                system.to_char(index // (base - 1) % base) + \
+                system.to_char(index % (base - 1) + 1)
+            ranks.append(left.value + suffix)
+        return ranks
+
+
+def _bench_parse(ranks: List[str]) -> Callable[[], int]:
+    def run():
+        for rank in ranks:
+            LexoRank.parse(rank)
+        return len(ranks)
+    return run
+
+
+def _bench_between(pairs: List[Tuple[LexoRank, LexoRank]]) -> Callable[[], int]:
+    def run():
+        for left, right in pairs:
+            left.between(right)
+        return len(pairs)
+    return run
+
+
+def _bench_append_chain(size: int) -> Callable[[], int]:
+    def run():
+        rank = LexoRank.middle()
+        for _ in range(size):
+            rank = rank.gen_next()
+        return size
+    return run
+
+
+def _bench_prepend_chain(size: int) -> Callable[[], int]:
+    def run():
+        rank = LexoRank.middle()
+        for _ in range(size):
+            rank = rank.gen_prev()
+        return size
+    return run
+
+
+def _bench_head_insert_chain(size: int) -> Callable[[], int]:
+    def run():
+        first = LexoRank.min()
+        rank = LexoRank.middle()
+        for _ in range(size):
+            rank = first.between(rank)
+        return size
+    return run
+
+
+def _bench_between_many(left: LexoRank, right: LexoRank, n: int) -> Callable[[], int]:
+    def run():
+        left.between_many(right, n)
+        return n
+    return run
+
+
+def _bench_middle(size: int) -> Callable[[], int]:
+    def run():
+        for _ in range(size):
+            LexoRank.middle()
+        return size
+    return run
+
+
+def _bench_format_decimal(decimals: List[LexoDecimal]) -> Callable[[], int]:
+    def run():
+        for decimal in decimals:
+            LexoRank._format_decimal(decimal)
+        return len(decimals)
+    return run
+
+
+def _bench_integer(
+        integers: List[LexoInteger], op: Callable[[LexoInteger, LexoInteger], LexoInteger]
+) -> Callable[[], int]:
+    pairs = list(zip(integers, reversed(integers)))
+
+    def run():
+        for left, right in pairs:
+            op(left, right)
+        return len(pairs)
+    return run
+
+
+def _bench_decimal_parse(strings: List[str]) -> Callable[[], int]:
+    def run():
+        for string in strings:
+            LexoDecimal.parse(string, LexoRank.NUMERAL_SYSTEM)
+        return len(strings)
+    return run
+
+
+def benchmarks(workloads: Workloads) -> Dict[str, Callable[[], int]]:
+    """ Name to benchmark mapping. Each benchmark returns the number of operations it ran """
+    size = workloads.size
+    benches = {
+        "parse_short": _bench_parse(workloads.short),
+        "parse_long": _bench_parse(workloads.long),
+        "between_short": _bench_between(workloads.short_pairs),
+        "between_long": _bench_between(workloads.long_pairs),
+        "gen_next_append_chain": _bench_append_chain(size),
+        "gen_prev_prepend_chain": _bench_prepend_chain(size),
+        "between_head_insert_chain": _bench_head_insert_chain(min(size, 200)),
+        "middle": _bench_middle(size),
+        "format_decimal_long": _bench_format_decimal(workloads.long_decimals),
+        "integer_add": _bench_integer(workloads.integers, lambda l, r: l + r),
+        "integer_subtract": _bench_integer(workloads.integers, lambda l, r: l - r),
+        "integer_multiply": _bench_integer(workloads.integers, lambda l, r: l * r),
+        "decimal_parse_long": _bench_decimal_parse(workloads.decimal_strings),
+    }
+    # Added after the original implementation
+    if hasattr(LexoRank, "between_many"):
+        left, right = workloads.long_pairs[0]
+        benches["between_many_long"] = _bench_between_many(left, right, size)
+    return benches
+
+
+def run_benchmarks(size: int, repeat: int, only: List[str]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, bench in benchmarks(Workloads(size)).items():
+        if only and name not in only:
+            continue
+        timings = []
+        ops = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ops = bench()
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            "ops": ops,
+            "min_s": min(timings),
+            "median_s": statistics.median(timings),
+            "ns_per_op": min(timings) / ops * 1e9,
+        }
+    return results
+
+
+def compare(
+        results: Dict[str, Dict[str, float]],
+        baseline: Dict[str, Dict[str, float]],
+        tolerance: float
+) -> List[str]:
+    """ Names of the benchmarks that are slower than the baseline by more than tolerance """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["ns_per_op"] / baseline[name]["ns_per_op"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="LexoRank hot path benchmarks")
+    parser.add_argument("--size", type=int, default=2000, help="ranks per workload")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--only", nargs="*", default=[], help="benchmark names to run")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="write the results as a new baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed slowdown before failing"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.size, args.repeat, args.only)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "size": args.size,
+        "repeat": args.repeat,
+        "results": results,
+        "regressions": regressions,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            file.write(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+    for name in regressions:
+        print(
+            f"Regression: {name} is {results[name]['baseline_ratio']:.2f}x the baseline",
+            file=sys.stderr
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+File:           simulate_workload.py
+Created on:     18/10/26, 8:09 pm
+
+Replays synthetic or recorded insert traces on an in-memory list of ranks and reports how
+the rank lengths grow, to predict when a list will need a rebalance.
+
+A recorded trace has one operation per line:
+    insert <position>
+    move <from_position> <to_position>
+
+Usage:
+    python -m benchmarks.simulate_workload --pattern hotspot --initial 1000 --threshold 64
+    python -m benchmarks.simulate_workload --trace inserts.txt
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src.lexo_rank import LexoRank
+
+Operation = Tuple[str, int, int]
+
+PATTERNS = ("top", "bottom", "random", "hotspot", "churn")
+
+
+class WorkloadSimulator:
+    """ Apply insert and move operations to a sorted list of ranks and track rank lengths """
+
+    def __init__(
+            self,
+            initial: int = 0,
+            threshold: Optional[int] = None,
+            sample_every: int = 100
+    ):
+        self.ranks: List[LexoRank] = list(LexoRank.initial_sequence(initial))
+        self.threshold = threshold
+        self.sample_every = sample_every
+        self.ops = 0
+        self.ops_until_threshold: Optional[int] = None
+        self.samples = []
+
+    def rank_at(self, position: int) -> LexoRank:
+        """ Rank for a new item placed at position, computed from its neighbours """
+        if not 0 <= position <= len(self.ranks):
+            raise ValueError(f"Position {position} is outside a list of {len(self.ranks)}")
+        left = self.ranks[position - 1] if position > 0 else None
+        right = self.ranks[position] if position < len(self.ranks) else None
+        if left is not None and right is not None:
+            return left.between(right)
+        if left is not None:
+            return left.gen_next()
+        if right is not None:
+            return right.gen_prev()
+        return LexoRank.middle()
+
+    def insert(self, position: int):
+        rank = self.rank_at(position)
+        self.ranks.insert(position, rank)
+        self._record(rank)
+
+    def move(self, from_position: int, to_position: int):
+        self.ranks.pop(from_position)
+        self.insert(to_position)
+
+    def apply(self, operations: Iterable[Operation]):
+        for op, first, second in operations:
+            if op == "insert":
+                self.insert(first)
+            elif op == "move":
+                self.move(first, second)
+            else:
+                raise ValueError(f"Unknown operation: {op}")
+
+    def _record(self, rank: LexoRank):
+        self.ops += 1
+        if self.threshold is not None and self.ops_until_threshold is None \
+                and len(rank.value) > self.threshold:
+            self.ops_until_threshold = self.ops
+        if self.ops % self.sample_every == 0:
+            self.samples.append(self.length_stats())
+
+    def length_stats(self) -> dict:
+        lengths = sorted(len(rank.value) for rank in self.ranks)
+        if not lengths:
+            return {"ops": self.ops, "count": 0}
+        return {
+            "ops": self.ops,
+            "count": len(lengths),
+            "mean": statistics.fmean(lengths),
+            "p50": lengths[len(lengths) // 2],
+            "p99": lengths[min(len(lengths) - 1, len(lengths) * 99 // 100)],
+            "max": lengths[-1],
+        }
+
+
+def synthetic_operations(
+        pattern: str, ops: int, simulator: WorkloadSimulator, seed: int
+) -> Iterator[Operation]:
+    """ Generate operations lazily, as positions depend on the current list size """
+    rnd = random.Random(seed)
+    if pattern == "hotspot" and not simulator.ranks:
+        raise ValueError("The hotspot pattern needs an initial list, use --initial")
+    # Every hotspot insert goes right after the previous one, before the same neighbour
+    hotspot = len(simulator.ranks) // 2
+    for _ in range(ops):
+        size = len(simulator.ranks)
+        if pattern == "top":
+            yield "insert", 0, 0
+        elif pattern == "bottom":
+            yield "insert", size, 0
+        elif pattern == "random":
+            yield "insert", rnd.randint(0, size), 0
+        elif pattern == "hotspot":
+            yield "insert", hotspot, 0
+            hotspot += 1
+        elif pattern == "churn":
+            if size < 2:
+                yield "insert", size, 0
+            else:
+                yield "move", rnd.randrange(size), rnd.randrange(size)
+        else:
+            raise ValueError(f"Unknown pattern: {pattern}")
+
+
+def read_trace(lines: Iterable[str]) -> Iterator[Operation]:
+    for line in lines:
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        if parts[0] == "insert":
+            yield "insert", int(parts[1]), 0
+        elif parts[0] == "move":
+            yield "move", int(parts[1]), int(parts[2])
+        else:
+            raise ValueError(f"Unknown trace operation: {line.strip()}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate rank length growth")
+    parser.add_argument("--pattern", choices=PATTERNS, default="random")
+    parser.add_argument("--trace", help="replay a recorded trace instead of a pattern")
+    parser.add_argument("--ops", type=int, default=10000, help="synthetic operations to run")
+    parser.add_argument("--initial", type=int, default=0, help="ranks in the list at start")
+    parser.add_argument("--threshold", type=int, help="rank length that needs a rebalance")
+    parser.add_argument("--sample-every", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if not args.trace and args.pattern == "hotspot" and args.initial < 1:
+        parser.error("the hotspot pattern needs --initial of at least 1")
+
+    simulator = WorkloadSimulator(args.initial, args.threshold, args.sample_every)
+    start = time.perf_counter()
+    if args.trace:
+        with open(args.trace) as file:
+            simulator.apply(read_trace(file))
+    else:
+        simulator.apply(synthetic_operations(args.pattern, args.ops, simulator, args.seed))
+    elapsed = time.perf_counter() - start
+    report = {
+        "workload": args.trace or args.pattern,
+        "ops": simulator.ops,
+        "seconds": elapsed,
+        "ops_per_sec": simulator.ops / elapsed if elapsed else None,
+        "threshold": args.threshold,
+        "ops_until_threshold": simulator.ops_until_threshold,
+        "final": simulator.length_stats(),
+        "samples": simulator.samples,
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,82 +4,172 @@ Author:         Dibyaranjan Sathua
 Created on:     31/12/21, 8:38 pm
 
 Reference: https://github.com/kvandake/lexorank-ts
+
+Command line rank maintenance. Ranks are read one per line from a file or stdin ("-") and
+written one per line, so memory use does not depend on the size of the input.
+
+Usage:
+    python main.py validate ranks.txt
+    python main.py rebalance ranks.txt > pairs.tsv
+    python main.py seed 1000000 > ranks.txt
+    python main.py between "0|hzzzzz:" "0|i00007:" -n 10
 """
+import argparse
+import json
+import mmap
+import sys
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from src.lexo_numeral_system import (
+    LexoNumeralSystem, LexoNumeralSystem36, LexoNumeralSystem62, LexoNumeralSystem90
+)
 from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+from src.lexo_rank_rebalancer import LexoRankRebalancer
+
+SYSTEMS = {36: LexoNumeralSystem36, 62: LexoNumeralSystem62, 90: LexoNumeralSystem90}
+CHUNK_SIZE = 1 << 20
+
+
+def read_lines(path: str, use_mmap: bool = False) -> Iterator[str]:
+    """ Lines of a file or stdin without their line ending """
+    if path == "-":
+        for line in sys.stdin:
+            yield line.rstrip("\r\n")
+        return
+    if use_mmap:
+        with open(path, "rb") as file:
+            # mmap can not map an empty file
+            if not file.seek(0, 2):
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for line in iter(mapped.readline, b""):
+                    yield line.rstrip(b"\r\n").decode("ascii")
+        return
+    with open(path) as file:
+        for line in file:
+            yield line.rstrip("\r\n")
+
+
+def count_lines(path: str) -> int:
+    """ Number of lines of a file, counted in fixed size chunks """
+    count = 0
+    last = b"\n"
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+    return count if last == b"\n" else count + 1
+
+
+def validate(lines: Iterator[str], system: LexoNumeralSystem, out: TextIO, max_errors: int) -> int:
+    """ Check that ranks are canonical, sorted and unique, and report their length histogram """
+    lengths: Dict[int, int] = {}
+    errors: List[str] = []
+    error_count = 0
+    count = 0
+    prev: Optional[str] = None
+    for number, line in enumerate(lines, 1):
+        count += 1
+        lengths[len(line)] = lengths.get(len(line), 0) + 1
+        error = None
+        if not LexoRank.is_canonical(line, system):
+            error = f"line {number}: {line!r} is not a valid rank"
+        elif prev is not None:
+            if line == prev:
+                error = f"line {number}: duplicate rank {line}"
+            elif line < prev:
+                error = f"line {number}: {line} is not sorted after {prev}"
+        if error is not None:
+            error_count += 1
+            if len(errors) < max_errors:
+                errors.append(error)
+        else:
+            # The next line is checked against the last line that passed
+            prev = line
+    report = {
+        "ranks": count,
+        "valid": not error_count,
+        "errors": error_count,
+        "first_errors": errors,
+        "length_histogram": dict(sorted(lengths.items())),
+    }
+    out.write(json.dumps(report, indent=2) + "\n")
+    return 0 if not error_count else 1
+
+
+def rebalance(
+        path: str, count: Optional[int], system: LexoNumeralSystem, out: TextIO, use_mmap: bool
+) -> int:
+    """ Write "old<TAB>new" for every rank, moving the list to the next bucket """
+    if count is None:
+        if path == "-":
+            raise ValueError("--count is required to rebalance stdin")
+        count = count_lines(path)
+    lines = read_lines(path, use_mmap)
+    first = next(lines, None)
+    if first is None:
+        return 0
+    bucket = LexoRankBucket.make_from(first.partition("|")[0])
+    rebalancer = LexoRankRebalancer(bucket, count, system=system)
+
+    def ranks() -> Iterator[str]:
+        yield first
+        yield from lines
+
+    out.writelines(f"{old}\t{new}\n" for old, new in rebalancer.rebalance(ranks()))
+    return 0
+
+
+def seed(n: int, bucket: LexoRankBucket, system: LexoNumeralSystem, out: TextIO) -> int:
+    """ Write n evenly spaced initial ranks """
+    out.writelines(f"{rank}\n" for rank in LexoRank.initial_sequence(n, bucket, system))
+    return 0
+
+
+def between(a: str, b: str, n: int, system: LexoNumeralSystem, out: TextIO) -> int:
+    """ Write n evenly spaced ranks between a and b """
+    left = LexoRank.parse(a, system=system)
+    right = LexoRank.parse(b, system=system)
+    out.writelines(f"{rank}\n" for rank in left.iter_between(right, n))
+    return 0
+
 
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rank maintenance")
+    parser.add_argument("--base", type=int, choices=sorted(SYSTEMS), default=36)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    validate_parser = subparsers.add_parser("validate", help="check a sorted file of ranks")
+    validate_parser.add_argument("file", nargs="?", default="-")
+    validate_parser.add_argument("--mmap", action="store_true", help="memory map the file")
+    validate_parser.add_argument("--max-errors", type=int, default=10)
+    rebalance_parser = subparsers.add_parser("rebalance", help="move ranks to the next bucket")
+    rebalance_parser.add_argument("file", nargs="?", default="-")
+    rebalance_parser.add_argument("--mmap", action="store_true", help="memory map the file")
+    rebalance_parser.add_argument("--count", type=int, help="number of ranks, counted if omitted")
+    seed_parser = subparsers.add_parser("seed", help="generate initial ranks")
+    seed_parser.add_argument("n", type=int)
+    seed_parser.add_argument("--bucket", default="0")
+    between_parser = subparsers.add_parser("between", help="generate ranks in a gap")
+    between_parser.add_argument("a")
+    between_parser.add_argument("b")
+    between_parser.add_argument("-n", type=int, default=1)
+    args = parser.parse_args(argv)
 
-def main():
-    # min_lexo_rank = LexoRank.min()
-    # print(min_lexo_rank)
-    # max_lexo_rank = LexoRank.max()
-    # print(max_lexo_rank)
-    mid_lexo_rank = LexoRank.middle()
-    print(mid_lexo_rank)
-    # next_lexo_rank = mid_lexo_rank.gen_next()
-    # print(next_lexo_rank)
-    # next_lexo_rank = next_lexo_rank.gen_next()
-    # print(next_lexo_rank)
-    # prev_lexo_rank = next_lexo_rank.gen_prev()
-    # print(prev_lexo_rank)
-    # prev_lexo_rank1 = mid_lexo_rank.gen_prev()
-    # print(prev_lexo_rank1)
-    # prev_lexo_rank2 = prev_lexo_rank.gen_prev()
-    # print(prev_lexo_rank2)
-
-    # ranks = []
-    # lexo_rank1 = LexoRank.parse('0|0i0000:')
-    # print(f"1. {lexo_rank1}")
-    # ranks.append(str(lexo_rank1))
-    # lexo_rank2 = lexo_rank1.gen_next()
-    # print(f"2. {lexo_rank2}")
-    # ranks.append(str(lexo_rank2))
-    # lexo_rank3 = lexo_rank2.gen_next()
-    # print(f"3. {lexo_rank3}")
-    # ranks.append(str(lexo_rank3))
-    # lexo_rank31 = lexo_rank3.gen_next()
-    # print(f"4. {lexo_rank31}")
-    # ranks.append(str(lexo_rank31))
-    # lexo_rank4 = lexo_rank3.gen_prev()
-    # print(f"<-3. {lexo_rank4}")
-    # ranks.append(str(lexo_rank4))
-    # lexo_rank5 = lexo_rank4.gen_prev()
-    # print(f"<-<-3. {lexo_rank5}")
-    # ranks.append(str(lexo_rank5))
-    # lexo_rank6 = lexo_rank5.gen_prev()
-    # print(f"<-<-<-3. {lexo_rank6}")
-    # ranks.append(str(lexo_rank6))
-    #
-    # # Sort all the ranks
-    # ranks.sort()
-    # print(ranks)
-    #
-    # lexo_rank1 = LexoRank.parse('0|0i0008:')
-    # print(f"1. {lexo_rank1}")
-    # lexo_rank2 = lexo_rank1.gen_next()
-    # print(f"1->. {lexo_rank2}")
-    # lexo_rank3 = lexo_rank1.gen_prev()
-    # print(f"1<-. {lexo_rank3}")
-
-    ranks = []
-    lexo_rank1 = LexoRank.parse('0|0i0000:')
-    print(lexo_rank1)
-    ranks.append(lexo_rank1)
-    lexo_rank2 = lexo_rank1.gen_next()
-    print(lexo_rank2)
-    ranks.append(lexo_rank2)
-    lexo_rank1p5 = lexo_rank1.between(lexo_rank2)
-    print(lexo_rank1p5)
-    ranks.append(lexo_rank1p5)
-    lexo_rank1p25 = lexo_rank1.between(lexo_rank1p5)
-    print(lexo_rank1p25)
-    ranks.append(lexo_rank1p25)
-    lexo_rank1p75 = lexo_rank1p5.between(lexo_rank2)
-    print(lexo_rank1p75)
-    ranks.append(lexo_rank1p75)
-
-    ranks.sort()
-    print(ranks)
+    system = SYSTEMS[args.base]()
+    out = sys.stdout
+    try:
+        if args.command == "validate":
+            return validate(read_lines(args.file, args.mmap), system, out, args.max_errors)
+        if args.command == "rebalance":
+            return rebalance(args.file, args.count, system, out, args.mmap)
+        if args.command == "seed":
+            return seed(args.n, LexoRankBucket.make_from(args.bucket), system, out)
+        return between(args.a, args.b, args.n, system, out)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
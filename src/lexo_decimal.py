@@ -3,42 +3,35 @@ File:           lexo_decimal.py
 Author:         Dibyaranjan Sathua
 Created on:     26/12/21, 5:00 pm
 """
+from typing import Tuple
 from src.lexo_numeral_system import LexoNumeralSystem
 from src.lexo_integer import LexoInteger
 
 
 class LexoDecimal:
     """ Decimal class for lexo ranking """
+    __slots__ = ("mag", "sig")
 
     def __init__(self, mag: LexoInteger, sig: int):
-        self.mag = mag
-        self.sig = sig
+        object.__setattr__(self, "mag", mag)
+        object.__setattr__(self, "sig", sig)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return LexoDecimal, (self.mag, self.sig)
 
     def __add__(self, other: "LexoDecimal") -> "LexoDecimal":
-        self_mag = self.mag
-        self_sig = self.sig
-        other_mag = other.mag
-        other_sig = other.sig
-        while self_sig < other_sig:
-            self_mag = self_mag << 1
-            self_sig += 1
-        while other_sig < self_sig:
-            other_mag = other_mag << 1
-            other_sig += 1
-        return LexoDecimal.make(self_mag + other_mag, self_sig)
+        self_mag, other_mag, sig = self._align(other)
+        return LexoDecimal.make(self_mag + other_mag, sig)
 
     def __sub__(self, other: "LexoDecimal") -> "LexoDecimal":
-        self_mag = self.mag
-        self_sig = self.sig
-        other_mag = other.mag
-        other_sig = other.sig
-        while self_sig < other_sig:
-            self_mag = self_mag << 1
-            self_sig += 1
-        while other_sig < self_sig:
-            other_mag = other_mag << 1
-            other_sig += 1
-        return LexoDecimal.make(self_mag - other_mag, self_sig)
+        self_mag, other_mag, sig = self._align(other)
+        return LexoDecimal.make(self_mag - other_mag, sig)
 
     def __mul__(self, other: "LexoDecimal") -> "LexoDecimal":
         return LexoDecimal.make(self.mag * other.mag, self.sig + other.sig)
@@ -50,6 +43,9 @@ class LexoDecimal:
             return False
         return self.mag == other.mag and self.sig == other.sig
 
+    def __hash__(self) -> int:
+        return hash((self.mag.value, self.sig))
+
     def __str__(self) -> str:
         int_str = str(self.mag)
         if self.sig == 0:
@@ -59,8 +55,7 @@ class LexoDecimal:
                 int_str.startswith(self.mag.system.negative_char):
             head = int_str[0]
             int_str = int_str[1:]
-        while len(int_str) < self.sig + 1:
-            int_str = self.mag.system.to_char(0) + int_str
+        int_str = int_str.rjust(self.sig + 1, self.mag.system.to_char(0))
         pos = len(int_str) - self.sig
         int_str = int_str[:pos] + self.mag.system.radix_point_char + int_str[pos:]
         if len(int_str) - self.sig == 0:
@@ -84,10 +79,7 @@ class LexoDecimal:
     def is_exact(self) -> bool:
         if self.sig == 0:
             return True
-        for i in range(0, self.sig):
-            if self.mag.get_mag(i) != 0:
-                return False
-        return True
+        return abs(self.mag.value) % self.get_system().get_base ** self.sig == 0
 
     def get_system(self) -> LexoNumeralSystem:
         return self.mag.system
@@ -105,30 +97,44 @@ class LexoDecimal:
             new_mag += LexoInteger.one(new_mag.system)
         return LexoDecimal.make(new_mag, nsig)
 
+    def scaled(self, scale: int, ceiling: bool = False) -> LexoInteger:
+        """ Magnitude of the decimal written with scale fraction digits, rounded down or up """
+        if scale >= self.sig:
+            return self.mag << (scale - self.sig)
+        divisor = self.get_system().get_base ** (self.sig - scale)
+        value = -(-self.mag.value // divisor) if ceiling else self.mag.value // divisor
+        return LexoInteger.from_int(self.get_system(), value)
+
     def compare_to(self, other: "LexoDecimal") -> int:
         if id(self) == id(other):
             return 0
         if not other:
             return 1
-        self_mag = self.mag
-        other_mag = other.mag
-        if self.sig > other.sig:
-            other_mag = other_mag << (self.sig - other.sig)
-        elif self.sig < other.sig:
-            self_mag = self_mag << (other.sig - self.sig)
+        self_mag, other_mag, _ = self._align(other)
         return self_mag.compare_to(other_mag)
 
+    def _align(self, other: "LexoDecimal") -> Tuple[LexoInteger, LexoInteger, int]:
+        """ Shift the magnitudes of both decimals to a common scale in a single step """
+        if self.sig < other.sig:
+            return self.mag << (other.sig - self.sig), other.mag, other.sig
+        if other.sig < self.sig:
+            return self.mag, other.mag << (self.sig - other.sig), self.sig
+        return self.mag, other.mag, self.sig
+
     @staticmethod
     def make(integer: LexoInteger, sig: int) -> "LexoDecimal":
         if integer.is_zero():
             return LexoDecimal(integer, 0)
-        # Count zeros at the beginning of integer.mag
-        zero_count = 0
-        while zero_count < sig and integer.get_mag(zero_count) == 0:
-            zero_count += 1
-        new_integer = integer >> zero_count
-        new_sig = sig - zero_count
-        return LexoDecimal(new_integer, new_sig)
+        # Strip the zero digits at the end of the fraction
+        base = integer.system.get_base
+        value = integer.value
+        new_sig = sig
+        while new_sig > 0 and value % base == 0:
+            value //= base
+            new_sig -= 1
+        if new_sig == sig:
+            return LexoDecimal(integer, sig)
+        return LexoDecimal(LexoInteger.from_int(integer.system, value), new_sig)
 
     @staticmethod
     def make_from(integer: LexoInteger) -> "LexoDecimal":
@@ -137,7 +143,7 @@ class LexoDecimal:
     @staticmethod
     def half(system: LexoNumeralSystem) -> "LexoDecimal":
         mid = system.get_base // 2 | 0
-        return LexoDecimal.make(LexoInteger.make(system, 1, [mid]), 1)
+        return LexoDecimal.make(LexoInteger.from_int(system, mid), 1)
 
     @staticmethod
     def parse(string: str, system: LexoNumeralSystem) -> "LexoDecimal":
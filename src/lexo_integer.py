@@ -8,107 +8,72 @@ from src.lexo_numeral_system import LexoNumeralSystem
 
 
 class LexoInteger:
-    """ Integer system """
-    ZERO_MAG = [0]
-    ONE_MAG = [1]
+    """
+    Integer system.
+    The value is held as a native python int, digits in the numeral system are only
+    produced when the integer is formatted. The constructor, make and the static digit list
+    helpers keep their original sign and little endian digit list signatures; from_int
+    builds an integer straight from a python int.
+    """
+    __slots__ = ("system", "value")
+    ZERO_MAG = (0,)
+    ONE_MAG = (1,)
     NEGATIVE_SIGN = -1
     ZERO_SIGN = 0
     POSITIVE_SIGN = 1
 
     def __init__(self, system: LexoNumeralSystem, sign: int, mag: List[int]):
-        self.system = system
-        self.sign = sign
-        self.mag = mag
+        value = 0
+        for digit in reversed(mag):
+            value = value * system.get_base + digit
+        object.__setattr__(self, "system", system)
+        object.__setattr__(self, "value", -value if sign == LexoInteger.NEGATIVE_SIGN else value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return LexoInteger.from_int, (self.system, self.value)
 
     def __add__(self, other: "LexoInteger") -> "LexoInteger":
         """ Addition of two LexoInteger """
-        if self.is_zero():
-            return other
-        if other.is_zero():
-            return self
-        if self.sign == other.sign:
-            result = LexoInteger.add(self.system, self.mag, other.mag)
-            return LexoInteger.make(self.system, self.sign, result)
-        # If signs are different
-        if self.sign == -1:
-            negate = self.negate()
-            value = negate - other
-            return value.negate()
-        negate = other.negate()
-        return self - negate
+        return LexoInteger.from_int(self.system, self.value + other.value)
 
     def __iadd__(self, other: "LexoInteger") -> "LexoInteger":
         return self.__add__(other)
 
     def __sub__(self, other: "LexoInteger") -> "LexoInteger":
         """ Subtraction of two LexoInteger """
-        if self.is_zero():
-            return other.negate()
-        if other.is_zero():
-            return self
-        if self.sign == other.sign:
-            cmp = LexoInteger.compare(self.mag, other.mag)
-            if cmp == 0:
-                return LexoInteger.zero(self.system)
-            elif cmp < 0:
-                return LexoInteger.make(
-                    self.system,
-                    1 if self.sign == -1 else -1,
-                    LexoInteger.subtract(self.system, other.mag, self.mag)
-                )
-            else:
-                return LexoInteger.make(
-                    self.system,
-                    -1 if self.sign == -1 else 1,
-                    LexoInteger.subtract(self.system, self.mag, other.mag)
-                )
-        # If signs are different
-        if self.sign == -1:
-            negate = self.negate()
-            value = negate + other
-            return value.negate()
-        negate = other.negate()
-        return self + negate
+        return LexoInteger.from_int(self.system, self.value - other.value)
 
     def __isub__(self, other: "LexoInteger") -> "LexoInteger":
-        return self.__isub__(other)
+        return self.__sub__(other)
 
     def __mul__(self, other: "LexoInteger") -> "LexoInteger":
-        if self.is_zero():
-            return self
-        if other.is_zero():
-            return other
-        if self.is_oneish():
-            return LexoInteger.make(self.system, 1, other.mag) \
-                if self.sign == other.sign \
-                else LexoInteger.make(self.system, -1, other.mag)
-        if other.is_oneish():
-            return LexoInteger.make(self.system, 1, self.mag) \
-                if self.sign == other.sign \
-                else LexoInteger.make(self.system, -1, self.mag)
-        new_mag = LexoInteger.multiply(self.system, self.mag, other.mag)
-        return LexoInteger.make(self.system, 1, new_mag) \
-            if self.sign == other.sign \
-            else LexoInteger.make(self.system, -1, new_mag)
+        return LexoInteger.from_int(self.system, self.value * other.value)
 
     def __imul__(self, other):
         return self.__mul__(other)
 
     def __lshift__(self, other: int = 1) -> "LexoInteger":
-        """ Left shift by other times """
+        """ Left shift by other digits """
         if not other:
             return self
         if other < 0:
             return self >> abs(other)
-        new_mag = [0] * other + self.mag    # Shift the mah list to left by other
-        return LexoInteger.make(self.system, self.sign, new_mag)
+        return LexoInteger.from_int(self.system, self.value * self.system.get_base ** other)
 
     def __rshift__(self, other: int = 1) -> "LexoInteger":
-        """ Right shift by other times """
-        if len(self.mag) - other <= 0:
-            return LexoInteger.zero(self.system)
-        new_mag = self.mag[other:]        # Shift the mag list to right by other
-        return LexoInteger.make(self.system, self.sign, new_mag)
+        """ Right shift by other digits. Dropped digits are truncated towards zero """
+        if not other:
+            return self
+        if other < 0:
+            return self << abs(other)
+        mag = abs(self.value) // self.system.get_base ** other
+        return LexoInteger.from_int(self.system, -mag if self.value < 0 else mag)
 
     def __eq__(self, other: "LexoInteger") -> bool:
         """ Compare two lexo integer objects """
@@ -116,52 +81,73 @@ class LexoInteger:
             return True
         if not other:
             return False
-        return self.system.get_base == other.system.get_base and self.compare_to(other) == 0
+        return self.system.get_base == other.system.get_base and self.value == other.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
 
     def __str__(self) -> str:
-        if self.is_zero():
-            return self.system.to_char(0)
-        string = ""
-        for x in self.mag:
-            string = self.system.to_char(x) + string
-        if self.sign == -1:
+        string = self.system.format_int(abs(self.value))
+        if self.value < 0:
             string = self.system.negative_char + string
         return string
 
     def __repr__(self):
         return str(self)
 
+    @property
+    def sign(self) -> int:
+        if self.value > 0:
+            return LexoInteger.POSITIVE_SIGN
+        if self.value < 0:
+            return LexoInteger.NEGATIVE_SIGN
+        return LexoInteger.ZERO_SIGN
+
+    @property
+    def mag(self) -> List[int]:
+        """ Little endian digits of the absolute value """
+        if not self.value:
+            return list(LexoInteger.ZERO_MAG)
+        mag = []
+        value = abs(self.value)
+        base = self.system.get_base
+        while value:
+            value, digit = divmod(value, base)
+            mag.append(digit)
+        return mag
+
     def complement_digits(self, digits: int) -> "LexoInteger":
-        return LexoInteger.make(
-            self.system,
-            self.sign,
-            LexoInteger.complement(self.system, self.mag, digits)
-        )
+        if digits <= 0:
+            raise ValueError("Digits should be more than 0")
+        modulus = self.system.get_base ** digits
+        value = modulus - 1 - abs(self.value) % modulus
+        return LexoInteger.from_int(self.system, -value if self.value < 0 else value)
 
     def compliment(self) -> "LexoInteger":
-        return self.complement_digits(len(self.mag))
+        return self.complement_digits(self.digit_count())
 
     def negate(self) -> "LexoInteger":
         """ Negate the sign of a LexoInteger """
         if self.is_zero():
             return self
-        return LexoInteger.make(
-            self.system,
-            -1 if self.sign == 1 else 1,
-            self.mag
-        )
+        return LexoInteger.from_int(self.system, -self.value)
 
     def is_zero(self) -> bool:
-        return self.sign == 0 and len(self.mag) == 1 and self.mag[0] == 0
+        return self.value == 0
 
     def is_one(self) -> bool:
-        return self.sign == 1 and len(self.mag) == 1 and self.mag[0] == 1
+        return self.value == 1
 
     def get_mag(self, index: int) -> int:
-        return self.mag[index]
+        base = self.system.get_base
+        return abs(self.value) // base ** index % base
 
     def is_oneish(self) -> bool:
-        return len(self.mag) == 1 and self.mag[0] == 1
+        return self.value == 1 or self.value == -1
+
+    def digit_count(self) -> int:
+        """ Number of digits needed to write the absolute value """
+        return len(self.system.format_int(abs(self.value)))
 
     def compare_to(self, other: "LexoInteger") -> int:
         """ Compare two lexo integer and retrun 1 if self > other, 0 if self == other else -1 """
@@ -169,13 +155,7 @@ class LexoInteger:
             return 0
         if not other:
             return 1
-        cmp = LexoInteger.compare(self.mag, other.mag)
-        if self.sign == -1:
-            return -1 * cmp if other.sign == -1 else -1
-        if self.sign == 1:
-            return cmp if other.sign == 1 else 1
-        # self.sign can be 0
-        return 0 if other.sign == 0 else -1 * other.sign
+        return -1 if self.value < other.value else 1 if self.value > other.value else 0
 
     @staticmethod
     def parse(string: str, system: LexoNumeralSystem) -> "LexoInteger":
@@ -186,31 +166,31 @@ class LexoInteger:
         elif string.startswith(system.negative_char):
             string = string.lstrip(system.negative_char)
             sign = -1
-        mag = [system.to_digit(x) for x in string]
-        mag.reverse()
-        return LexoInteger.make(system, sign, mag)
+        return LexoInteger.from_int(system, sign * system.parse_int(string))
+
+    @staticmethod
+    def from_int(system: LexoNumeralSystem, value: int) -> "LexoInteger":
+        """ Make a LexoInteger from a python int """
+        integer = LexoInteger.__new__(LexoInteger)
+        object.__setattr__(integer, "system", system)
+        object.__setattr__(integer, "value", value)
+        return integer
 
     @staticmethod
     def make(system: LexoNumeralSystem, sign: int, mag: List[int]) -> "LexoInteger":
         """ Make a LexoInteger """
-        # Remove all trailing zeros from mag
-        new_mag = mag[:]
-        while new_mag:
-            if new_mag[-1]:
-                break
-            new_mag.pop()
-        if not new_mag:         # new_mag is empty
-            return LexoInteger.zero(system)
-        return LexoInteger(system, sign, new_mag)
+        return LexoInteger(system, sign, mag)
 
     @staticmethod
     def zero(system: LexoNumeralSystem) -> "LexoInteger":
-        return LexoInteger(system, 0, LexoInteger.ZERO_MAG)
+        return LexoInteger.from_int(system, 0)
 
     @staticmethod
     def one(system: LexoNumeralSystem) -> "LexoInteger":
-        return LexoInteger(system, 1, LexoInteger.ONE_MAG)
+        return LexoInteger.from_int(system, 1)
 
+    # Digit list arithmetic of the original implementation. The integers above do not use
+    # it any more, it is kept for callers of the static helpers.
     @staticmethod
     def add(system: LexoNumeralSystem, l: List[int], r: List[int]) -> List[int]:
         """ Add two LexoInteger objects """
@@ -282,7 +262,6 @@ class LexoInteger:
                 return 1
         return 0
 
-
 if __name__ == "__main__":
     int1 = LexoInteger.parse("1", LexoNumeralSystem())
     print(int1)
@@ -3,39 +3,128 @@ File:           lexo_numeral_system.py
 Author:         Dibyaranjan Sathua
 Created on:     08/12/21, 8:22 pm
 """
+import string as string_module
+from typing import Dict, List, Tuple
 
 
 class LexoNumeralSystem:
-    """ Numeral system of 36 characters """
-    DIGITS = list("0123456789abcdefghijklmnopqrstuvwxyz")
+    """
+    Numeral system of 36 characters.
+    Subclasses override DIGITS to get other bases. Digits must be in ascending character
+    order, so that rank strings sort bytewise in the same order as their values.
+    """
+    DIGITS_36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+    DIGITS = list(DIGITS_36)
+    POSITIVE_CHAR = "+"
+    NEGATIVE_CHAR = "-"
+    RADIX_POINT_CHAR = ":"
+    # Used by the rank format, so they can never be digits
+    RESERVED_CHARS = "|"
+
+    def __init__(self):
+        digits = "".join(self.DIGITS)
+        if len(set(digits)) != len(digits):
+            raise ValueError("Digits of a numeral system should be unique")
+        if sorted(digits) != list(digits):
+            raise ValueError("Digits of a numeral system should be in ascending order")
+        special = self.POSITIVE_CHAR + self.NEGATIVE_CHAR + self.RADIX_POINT_CHAR + \
+            self.RESERVED_CHARS
+        if set(special) & set(digits):
+            raise ValueError(f"Digits can not contain any of {special}")
+        # Plain attributes rather than properties, as they are read inside tight loops
+        self.get_base = len(digits)
+        self.positive_char = self.POSITIVE_CHAR
+        self.negative_char = self.NEGATIVE_CHAR
+        self.radix_point_char = self.RADIX_POINT_CHAR
+        self.digits = digits
+        self._encode: Tuple[str, ...] = tuple(digits)
+        self._decode: Dict[str, int] = {ch: index for index, ch in enumerate(digits)}
+        # int() natively parses prefixes of the 36 character alphabet
+        self._native = digits == LexoNumeralSystem.DIGITS_36[:len(digits)]
+        self._hash = hash(self._key())
+
+    def __eq__(self, other: "LexoNumeralSystem") -> bool:
+        if id(self) == id(other):
+            return True
+        if not isinstance(other, LexoNumeralSystem):
+            return False
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        # The tables are rebuilt from the class, there is no need to pickle them
+        return type(self), ()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(base={self.get_base})"
+
+    def _key(self) -> Tuple[str, str, str, str]:
+        return self.digits, self.positive_char, self.negative_char, self.radix_point_char
 
     def to_char(self, digit: int) -> str:
         """ Convert the digit to character """
-        if digit >= len(self.DIGITS):
-            raise ValueError(f"digit can not be more than {len(self.DIGITS) - 1}")
-        return self.DIGITS[digit]
-
-    @staticmethod
-    def to_digit(ch: str) -> int:
-        """ Convert characters to digit """
-        if "0" <= ch <= "9":
-            return ord(ch) - 48
-        if "a" <= ch <= "z":
-            return ord(ch) - 97 + 10
-        raise ValueError(f"Not a valid digit {ch}")
-
-    @property
-    def get_base(self) -> int:
-        return 36
-
-    @property
-    def positive_char(self) -> str:
-        return "+"
-
-    @property
-    def negative_char(self) -> str:
-        return "-"
-
-    @property
-    def radix_point_char(self) -> str:
-        return ":"
+        if not 0 <= digit < self.get_base:
+            raise ValueError(f"digit can not be more than {self.get_base - 1}")
+        return self._encode[digit]
+
+    @classmethod
+    def to_digit(cls, ch: str) -> int:
+        """ Convert characters to digit. Like the original static method it works on the class """
+        decode = cls.__dict__.get("_DIGIT_VALUES")
+        if decode is None:
+            # One table per class, as the digits only depend on the class
+            decode = {digit_ch: digit for digit, digit_ch in enumerate(cls.DIGITS)}
+            cls._DIGIT_VALUES = decode
+        digit = decode.get(ch)
+        if digit is None:
+            raise ValueError(f"Not a valid digit {ch}")
+        return digit
+
+    def parse_int(self, string: str) -> int:
+        """ Convert a string of digits to a python int """
+        invalid = set(string).difference(self._decode)
+        if invalid:
+            raise ValueError(f"Not a valid digit {next(ch for ch in string if ch in invalid)}")
+        if not string:
+            return 0
+        if self._native:
+            return int(string, self.get_base)
+        base = self.get_base
+        decode = self._decode
+        value = 0
+        for ch in string:
+            value = value * base + decode[ch]
+        return value
+
+    def format_int(self, value: int) -> str:
+        """ Convert a non negative python int to a string of digits """
+        if not value:
+            return self._encode[0]
+        base = self.get_base
+        encode = self._encode
+        chars: List[str] = []
+        while value:
+            value, digit = divmod(value, base)
+            chars.append(encode[digit])
+        return "".join(reversed(chars))
+
+
+class LexoNumeralSystem36(LexoNumeralSystem):
+    """ Numeral system of 36 characters, digits and lower case letters """
+
+
+class LexoNumeralSystem62(LexoNumeralSystem):
+    """ Numeral system of 62 characters, digits, upper and lower case letters """
+    DIGITS = list(
+        string_module.digits + string_module.ascii_uppercase + string_module.ascii_lowercase
+    )
+
+
+class LexoNumeralSystem90(LexoNumeralSystem):
+    """
+    Numeral system of the printable ASCII characters, except space and the characters the
+    rank format uses for signs, the radix point and the bucket separator.
+    """
+    DIGITS = [chr(code) for code in range(ord("!"), ord("~") + 1) if chr(code) not in "+-:|"]
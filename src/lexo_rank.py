@@ -5,31 +5,54 @@ Created on:     27/12/21, 9:39 pm
 
 Code transpiled from: https://github.com/kvandake/lexorank-ts
 """
-from typing import Optional
+import re
+from operator import attrgetter
+from typing import Optional, List, Iterator, Dict, Tuple, Pattern, Callable
 from functools import total_ordering
 
 from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_integer import LexoInteger
 from src.lexo_decimal import LexoDecimal
 from src.lexo_rank_bucket import LexoRankBucket
 
 
+class RebalanceNeededError(ValueError):
+    """ Raised when no rank fits in a gap within the allowed rank length """
+
+
 @total_ordering
 class LexoRank:
     """ Lexo rank main class """
+    __slots__ = ("value", "system", "_bucket", "_decimal")
     NUMERAL_SYSTEM: LexoNumeralSystem = LexoNumeralSystem()
-    _ZERO_DECIMAL: Optional[LexoDecimal] = None
-    _ONE_DECIMAL: Optional[LexoDecimal] = None
-    _EIGHT_DECIMAL: Optional[LexoDecimal] = None
-    _MIN_DECIMAL: Optional[LexoDecimal] = None
-    _MAX_DECIMAL: Optional[LexoDecimal] = None
-    _MID_DECIMAL: Optional[LexoDecimal] = None
-    _INITIAL_MIN_DECIMAL: Optional[LexoDecimal] = None
-    _INITIAL_MAX_DECIMAL: Optional[LexoDecimal] = None
+    INTEGER_DIGITS = 6
+    # Constant decimals and canonical rank patterns, built once per numeral system
+    _DECIMALS: Dict[Tuple[str, LexoNumeralSystem], LexoDecimal] = {}
+    _CANONICAL_PATTERNS: Dict[LexoNumeralSystem, Pattern] = {}
+    # Sort key giving the compare_to order: the rank strings, which are always canonical.
+    # It runs in C, so sorted(ranks, key=LexoRank.sort_key) costs about as much as sorting
+    # the strings, without a rich comparison per pair
+    sort_key: Callable[["LexoRank"], str] = attrgetter("value")
 
     def __init__(self, bucket: LexoRankBucket, decimal: LexoDecimal):
-        self.value = str(bucket) + "|" + LexoRank._format_decimal(decimal)
-        self.bucket = bucket
-        self.decimal = decimal
+        object.__setattr__(self, "value", str(bucket) + "|" + LexoRank._format_decimal(decimal))
+        object.__setattr__(self, "system", decimal.get_system())
+        object.__setattr__(self, "_bucket", bucket)
+        object.__setattr__(self, "_decimal", decimal)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        if self.system == LexoRank.NUMERAL_SYSTEM:
+            return LexoRank.from_bytes, (self.to_bytes(),)
+        return LexoRank.from_bytes, (self.to_bytes(), self.system)
+
+    def __hash__(self) -> int:
+        return hash(self.value)
 
     def __eq__(self, other: "LexoRank") -> bool:
         return self.compare_to(other) == 0
@@ -49,6 +72,36 @@ class LexoRank:
     def __repr__(self):
         return str(self)
 
+    @property
+    def key(self) -> str:
+        """ Plain string with the same order as the rank, see sort_key """
+        return self.value
+
+    @property
+    def bucket(self) -> LexoRankBucket:
+        if self._bucket is None:
+            self._decode()
+        return self._bucket
+
+    @property
+    def decimal(self) -> LexoDecimal:
+        if self._decimal is None:
+            self._decode()
+        return self._decimal
+
+    def _decode(self):
+        """ Build the bucket and decimal of a lazily parsed rank """
+        bucket, _, decimal = self.value.partition("|")
+        object.__setattr__(self, "_bucket", LexoRankBucket.make_from(bucket))
+        object.__setattr__(self, "_decimal", LexoDecimal.parse(decimal, self.system))
+
+    def to_bytes(self) -> bytes:
+        """ Order preserving binary form, comparing the bytes gives the rank order """
+        # The codec validates strings with LexoRank, so it can only be imported here
+        from src.lexo_rank_codec import LexoRankCodec
+        # value is always canonical, there is no need to validate it again
+        return LexoRankCodec.pack(self.value, self.system)
+
     def between(self, other: "LexoRank") -> "LexoRank":
         if not self.bucket == other.bucket:
             raise ValueError("between works on same bucket")
@@ -59,24 +112,60 @@ class LexoRank:
             return LexoRank(self.bucket, LexoRank.between_decimal(other.decimal, self.decimal))
         return LexoRank(self.bucket, LexoRank.between_decimal(self.decimal, other.decimal))
 
+    def between_many(
+            self, other: "LexoRank", n: int, max_length: Optional[int] = None
+    ) -> List["LexoRank"]:
+        """
+        Generate n sorted, evenly spaced ranks between two ranks in one pass. If max_length
+        is given and the ranks do not fit within it, RebalanceNeededError is raised.
+        """
+        return list(self.iter_between(other, n, max_length=max_length))
+
+    def iter_between(
+            self, other: "LexoRank", n: int, max_length: Optional[int] = None
+    ) -> Iterator["LexoRank"]:
+        """
+        Lazy between_many: the ranks are built one at a time as they are consumed. The
+        arguments are checked, and RebalanceNeededError raised, before the first rank.
+        """
+        if not self.bucket == other.bucket:
+            raise ValueError("between works on same bucket")
+        cmp = self.decimal.compare_to(other.decimal)
+        if cmp == 0:
+            raise ValueError("Try to rank between different ranks")
+        left, right = (other, self) if cmp > 0 else (self, other)
+        max_scale = None if max_length is None else LexoRank._max_scale(self.bucket, max_length)
+        bucket = self.bucket
+        decimals = LexoRank._spread_decimal(left.decimal, right.decimal, n, max_scale=max_scale)
+        return (LexoRank(bucket, decimal) for decimal in decimals)
+
+    def shortest_between(self, other: "LexoRank", max_length: Optional[int] = None) -> "LexoRank":
+        """
+        Shortest rank strictly between two ranks. If max_length is given and no rank of at
+        most that length fits, RebalanceNeededError is raised.
+        """
+        return self.between_many(other, 1, max_length=max_length)[0]
+
     def gen_prev(self) -> "LexoRank":
         if self.is_max():
-            return LexoRank(self.bucket, LexoRank.get_initial_max_decimal())
+            return LexoRank(self.bucket, LexoRank.get_initial_max_decimal(self.system))
         floor_integer = self.decimal.floor()
         floor_decimal = LexoDecimal.make_from(floor_integer)
-        next_decimal = floor_decimal - LexoRank.get_eight_decimal()
-        if next_decimal.compare_to(LexoRank.get_min_decimal()) <= 0:
-            next_decimal = LexoRank.between_decimal(LexoRank.get_min_decimal(), self.decimal)
+        next_decimal = floor_decimal - LexoRank.get_eight_decimal(self.system)
+        min_decimal = LexoRank.get_min_decimal(self.system)
+        if next_decimal.compare_to(min_decimal) <= 0:
+            next_decimal = LexoRank.between_decimal(min_decimal, self.decimal)
         return LexoRank(self.bucket, next_decimal)
 
     def gen_next(self) -> "LexoRank":
         if self.is_min():
-            return LexoRank(self.bucket, LexoRank.get_initial_min_decimal())
+            return LexoRank(self.bucket, LexoRank.get_initial_min_decimal(self.system))
         ceil_integer = self.decimal.ceil()
         ceil_decimal = LexoDecimal.make_from(ceil_integer)
-        next_decimal = ceil_decimal + LexoRank.get_eight_decimal()
-        if next_decimal.compare_to(LexoRank.get_max_decimal()) >= 0:
-            next_decimal = LexoRank.between_decimal(self.decimal, LexoRank.get_max_decimal())
+        next_decimal = ceil_decimal + LexoRank.get_eight_decimal(self.system)
+        max_decimal = LexoRank.get_max_decimal(self.system)
+        if next_decimal.compare_to(max_decimal) >= 0:
+            next_decimal = LexoRank.between_decimal(self.decimal, max_decimal)
         return LexoRank(self.bucket, next_decimal)
 
     def get_bucket(self) -> LexoRankBucket:
@@ -92,10 +181,10 @@ class LexoRank:
         return LexoRank.make_from(self.bucket.prev(), self.decimal)
 
     def is_min(self) -> bool:
-        return self.decimal == self.get_min_decimal()
+        return self.decimal == self.get_min_decimal(self.system)
 
     def is_max(self) -> bool:
-        return self.decimal == self.get_max_decimal()
+        return self.decimal == self.get_max_decimal(self.system)
 
     def compare_to(self, other: "LexoRank") -> int:
         if id(self) == id(other):
@@ -105,79 +194,119 @@ class LexoRank:
         return -1 if self.value < other.value else 1 if self.value > other.value else 0
 
     @staticmethod
-    def get_zero_decimal() -> LexoDecimal:
-        if LexoRank._ZERO_DECIMAL is None:
-            LexoRank._ZERO_DECIMAL = LexoDecimal.parse("0", LexoRank.NUMERAL_SYSTEM)
-        return LexoRank._ZERO_DECIMAL
+    def _get_decimal(
+            name: str,
+            system: Optional[LexoNumeralSystem],
+            factory: Callable[[LexoNumeralSystem], LexoDecimal]
+    ) -> LexoDecimal:
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        key = (name, system)
+        decimal = LexoRank._DECIMALS.get(key)
+        if decimal is None:
+            decimal = LexoRank._DECIMALS[key] = factory(system)
+        return decimal
 
     @staticmethod
-    def get_one_decimal() -> LexoDecimal:
-        if LexoRank._ONE_DECIMAL is None:
-            LexoRank._ONE_DECIMAL = LexoDecimal.parse("1", LexoRank.NUMERAL_SYSTEM)
-        return LexoRank._ONE_DECIMAL
+    def _integer_decimal(system: LexoNumeralSystem, value: int) -> LexoDecimal:
+        return LexoDecimal.make_from(LexoInteger.from_int(system, value))
 
     @staticmethod
-    def get_eight_decimal() -> LexoDecimal:
-        if LexoRank._EIGHT_DECIMAL is None:
-            LexoRank._EIGHT_DECIMAL = LexoDecimal.parse("8", LexoRank.NUMERAL_SYSTEM)
-        return LexoRank._EIGHT_DECIMAL
+    def get_zero_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank._get_decimal(
+            "zero", system, lambda sys: LexoRank._integer_decimal(sys, 0)
+        )
 
     @staticmethod
-    def get_min_decimal() -> LexoDecimal:
-        if LexoRank._MIN_DECIMAL is None:
-            LexoRank._MIN_DECIMAL = LexoRank.get_zero_decimal()
-        return LexoRank._MIN_DECIMAL
+    def get_one_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank._get_decimal(
+            "one", system, lambda sys: LexoRank._integer_decimal(sys, 1)
+        )
 
     @staticmethod
-    def get_max_decimal() -> LexoDecimal:
-        if LexoRank._MAX_DECIMAL is None:
-            LexoRank._MAX_DECIMAL = LexoDecimal.parse("1000000", LexoRank.NUMERAL_SYSTEM) - \
-                                    LexoRank.get_one_decimal()
-        return LexoRank._MAX_DECIMAL
+    def get_eight_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank._get_decimal(
+            "eight", system, lambda sys: LexoRank._integer_decimal(sys, 8)
+        )
 
     @staticmethod
-    def get_mid_decimal() -> LexoDecimal:
-        if LexoRank._MID_DECIMAL is None:
-            LexoRank._MID_DECIMAL = LexoRank.between_decimal(
-                LexoRank.get_min_decimal(), LexoRank.get_max_decimal()
+    def get_min_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank.get_zero_decimal(system)
+
+    @staticmethod
+    def get_max_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank._get_decimal(
+            "max", system,
+            lambda sys: LexoRank._integer_decimal(sys, sys.get_base ** LexoRank.INTEGER_DIGITS - 1)
+        )
+
+    @staticmethod
+    def get_mid_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank._get_decimal(
+            "mid", system,
+            lambda sys: LexoRank.between_decimal(
+                LexoRank.get_min_decimal(sys), LexoRank.get_max_decimal(sys)
             )
-        return LexoRank._MID_DECIMAL
+        )
 
     @staticmethod
-    def get_initial_min_decimal() -> LexoDecimal:
-        if LexoRank._INITIAL_MIN_DECIMAL is None:
-            LexoRank._INITIAL_MIN_DECIMAL = LexoDecimal.parse("100000", LexoRank.NUMERAL_SYSTEM)
-        return LexoRank._INITIAL_MIN_DECIMAL
+    def get_initial_min_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank._get_decimal(
+            "initial_min", system,
+            lambda sys: LexoRank._integer_decimal(
+                sys, sys.get_base ** (LexoRank.INTEGER_DIGITS - 1)
+            )
+        )
 
     @staticmethod
-    def get_initial_max_decimal() -> LexoDecimal:
-        if LexoRank._INITIAL_MAX_DECIMAL is None:
-            LexoRank._INITIAL_MAX_DECIMAL = LexoDecimal.parse(
-                LexoRank.NUMERAL_SYSTEM.to_char(LexoRank.NUMERAL_SYSTEM.get_base - 2) + "00000",
-                LexoRank.NUMERAL_SYSTEM
+    def get_initial_max_decimal(system: Optional[LexoNumeralSystem] = None) -> LexoDecimal:
+        return LexoRank._get_decimal(
+            "initial_max", system,
+            lambda sys: LexoRank._integer_decimal(
+                sys, (sys.get_base - 2) * sys.get_base ** (LexoRank.INTEGER_DIGITS - 1)
             )
-        return LexoRank._INITIAL_MAX_DECIMAL
+        )
 
     @staticmethod
-    def min() -> "LexoRank":
-        return LexoRank.make_from(LexoRankBucket.get_bucket_0(), LexoRank.get_min_decimal())
+    def min(
+            bucket: Optional[LexoRankBucket] = None, system: Optional[LexoNumeralSystem] = None
+    ) -> "LexoRank":
+        if bucket is None:
+            bucket = LexoRankBucket.get_bucket_0()
+        return LexoRank.make_from(bucket, LexoRank.get_min_decimal(system))
 
     @staticmethod
-    def max(bucket: Optional[LexoRankBucket] = None) -> "LexoRank":
+    def max(
+            bucket: Optional[LexoRankBucket] = None, system: Optional[LexoNumeralSystem] = None
+    ) -> "LexoRank":
         if bucket is None:
             bucket = LexoRankBucket.get_bucket_0()
-        return LexoRank.make_from(bucket, LexoRank.get_max_decimal())
+        return LexoRank.make_from(bucket, LexoRank.get_max_decimal(system))
 
     @staticmethod
-    def middle() -> "LexoRank":
-        min_lexo_rank = LexoRank.min()
-        return min_lexo_rank.between(LexoRank.max(min_lexo_rank.bucket))
+    def middle(system: Optional[LexoNumeralSystem] = None) -> "LexoRank":
+        min_lexo_rank = LexoRank.min(system=system)
+        return min_lexo_rank.between(LexoRank.max(min_lexo_rank.bucket, system))
 
     @staticmethod
-    def initial(bucket: LexoRankBucket) -> "LexoRank":
-        return LexoRank.make_from(bucket, LexoRank.get_initial_min_decimal()) \
+    def initial(bucket: LexoRankBucket, system: Optional[LexoNumeralSystem] = None) -> "LexoRank":
+        return LexoRank.make_from(bucket, LexoRank.get_initial_min_decimal(system)) \
             if bucket == LexoRankBucket.get_bucket_0() \
-            else LexoRank.make_from(bucket, LexoRank.get_initial_max_decimal())
+            else LexoRank.make_from(bucket, LexoRank.get_initial_max_decimal(system))
+
+    @staticmethod
+    def initial_sequence(
+            n: int,
+            bucket: Optional[LexoRankBucket] = None,
+            system: Optional[LexoNumeralSystem] = None
+    ) -> Iterator["LexoRank"]:
+        """ Lazily yield n evenly distributed ranks of the shortest possible width """
+        if bucket is None:
+            bucket = LexoRankBucket.get_bucket_0()
+        for decimal in LexoRank._spread_decimal(
+                LexoRank.get_min_decimal(system), LexoRank.get_max_decimal(system), n
+        ):
+            yield LexoRank(bucket, decimal)
 
     @staticmethod
     def between_decimal(old_left: LexoDecimal, old_right: LexoDecimal) -> LexoDecimal:
@@ -220,12 +349,123 @@ class LexoRank:
         return mid
 
     @staticmethod
-    def parse(string: str) -> "LexoRank":
+    def between_many_decimal(left: LexoDecimal, right: LexoDecimal, n: int) -> List[LexoDecimal]:
+        return list(LexoRank._spread_decimal(left, right, n))
+
+    @staticmethod
+    def _max_scale(bucket: LexoRankBucket, max_length: int) -> int:
+        """ Largest decimal scale of a rank string of at most max_length characters """
+        # bucket, "|", six integer digits and the radix point are always present
+        max_scale = max_length - len(str(bucket)) - 8
+        if max_scale < 0:
+            raise ValueError(f"max_length {max_length} is shorter than any rank")
+        return max_scale
+
+    @staticmethod
+    def _spread_scale(
+            left: LexoDecimal, right: LexoDecimal, n: int, max_scale: Optional[int] = None
+    ) -> int:
+        """
+        Smallest scale with room for n decimals strictly between left and right. Raises
+        RebalanceNeededError if even max_scale does not have enough room.
+        """
+        if max_scale is not None and \
+                right.scaled(max_scale, ceiling=True).value - left.scaled(max_scale).value - 1 < n:
+            raise RebalanceNeededError(
+                f"No room for {n} ranks between {left} and {right} within scale {max_scale}"
+            )
+        scale = 0
+        while right.scaled(scale, ceiling=True).value - left.scaled(scale).value - 1 < n:
+            scale += 1
+        return scale
+
+    @staticmethod
+    def _spread_decimal(
+            left: LexoDecimal,
+            right: LexoDecimal,
+            n: int,
+            start: int = 0,
+            max_scale: Optional[int] = None
+    ) -> Iterator[LexoDecimal]:
+        """
+        Lazy iterator of n evenly spaced decimals strictly between left and right, using the
+        smallest scale that has room for all of them. start skips the first decimals so a
+        partially consumed sequence can be resumed.
+        """
+        if n <= 0:
+            return iter(())
+        # The scale is found eagerly, so RebalanceNeededError is raised before the first decimal
+        scale = LexoRank._spread_scale(left, right, n, max_scale=max_scale)
+        low = left.scaled(scale).value
+        gap = right.scaled(scale, ceiling=True).value - low
+        system = left.get_system()
+        return (
+            LexoDecimal.make(LexoInteger.from_int(system, low + i * gap // (n + 1)), scale)
+            for i in range(start + 1, n + 1)
+        )
+
+    @staticmethod
+    def parse(
+            string: str, lazy: bool = False, system: Optional[LexoNumeralSystem] = None
+    ) -> "LexoRank":
+        """
+        Parse a rank string. A lazy rank keeps the validated string and only builds its
+        bucket and decimal when they are first needed, so sorting and comparing cost
+        about as much as on plain strings. Non canonical strings are always parsed eagerly.
+        """
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        if LexoRank._canonical_pattern(system).match(string):
+            rank = LexoRank.__new__(LexoRank)
+            object.__setattr__(rank, "value", string)
+            object.__setattr__(rank, "system", system)
+            object.__setattr__(rank, "_bucket", None)
+            object.__setattr__(rank, "_decimal", None)
+            if not lazy:
+                rank._decode()
+            return rank
         parts = string.split("|")
         bucket = LexoRankBucket.make_from(parts[0])
-        decimal = LexoDecimal.parse(parts[1], LexoRank.NUMERAL_SYSTEM)
+        decimal = LexoDecimal.parse(parts[1], system)
         return LexoRank(bucket, decimal)
 
+    @staticmethod
+    def from_bytes(data: bytes, system: Optional[LexoNumeralSystem] = None) -> "LexoRank":
+        """ Rank from its binary form. The bucket and decimal are decoded lazily """
+        from src.lexo_rank_codec import LexoRankCodec
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        return LexoRank.parse(LexoRankCodec.decode(data, system), lazy=True, system=system)
+
+    @staticmethod
+    def is_canonical(string: str, system: Optional[LexoNumeralSystem] = None) -> bool:
+        """
+        Whether string is a rank exactly as LexoRank writes it: a known bucket, six integer
+        digits, a fraction without trailing zeros, and a decimal not above the max
+        """
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        if not LexoRank._canonical_pattern(system).match(string):
+            return False
+        # The max decimal has no fraction, so only a fraction after its integer part is above it
+        top = system.digits[-1] * LexoRank.INTEGER_DIGITS + system.radix_point_char
+        decimal = string[string.index("|") + 1:]
+        return not (decimal.startswith(top) and len(decimal) > len(top))
+
+    @staticmethod
+    def _canonical_pattern(system: LexoNumeralSystem) -> Pattern:
+        """ Bucket, six integer digits and a fraction without trailing zeros """
+        pattern = LexoRank._CANONICAL_PATTERNS.get(system)
+        if pattern is None:
+            buckets = "".join(re.escape(str(bucket)) for bucket in LexoRankBucket.get_values())
+            digits = "".join(re.escape(ch) for ch in system.digits)
+            non_zero = "".join(re.escape(ch) for ch in system.digits[1:])
+            pattern = LexoRank._CANONICAL_PATTERNS[system] = re.compile(
+                f"[{buckets}]\\|[{digits}]{{{LexoRank.INTEGER_DIGITS}}}"
+                f"{re.escape(system.radix_point_char)}(?:[{digits}]*[{non_zero}])?\\Z"
+            )
+        return pattern
+
     @staticmethod
     def make_from(bucket: LexoRankBucket, decimal: LexoDecimal) -> "LexoRank":
         return LexoRank(bucket, decimal)
@@ -264,15 +504,15 @@ class LexoRank:
 
     @staticmethod
     def _format_decimal(decimal: LexoDecimal) -> str:
+        system = decimal.get_system()
         format_value = str(decimal)
         new_value = format_value
-        partial_index = format_value.find(LexoRank.NUMERAL_SYSTEM.radix_point_char)
-        zero = LexoRank.NUMERAL_SYSTEM.to_char(0)
+        partial_index = format_value.find(system.radix_point_char)
+        zero = system.to_char(0)
         if partial_index < 0:
             partial_index = len(format_value)
-            new_value += LexoRank.NUMERAL_SYSTEM.radix_point_char
-        while partial_index < 6:
-            new_value = zero + new_value
-            partial_index += 1
+            new_value += system.radix_point_char
+        if partial_index < LexoRank.INTEGER_DIGITS:
+            new_value = zero * (LexoRank.INTEGER_DIGITS - partial_index) + new_value
         new_value = new_value.rstrip(zero)
         return new_value
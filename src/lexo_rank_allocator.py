@@ -0,0 +1,76 @@
+"""
+File:           lexo_rank_allocator.py
+Created on:     18/10/26, 8:16 pm
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_block_store import RankBlockStore
+
+
+class LexoRankAllocator:
+    """
+    Hi-lo allocator of append ranks. Every thread reserves its own block of ranks from the
+    store and mints ranks out of it without any locking, so concurrent appenders never get
+    the same rank. Ranks of one thread are increasing, ranks of different threads interleave
+    by block. Once a block runs low the next one is reserved on a background thread.
+    """
+
+    def __init__(
+            self,
+            store: RankBlockStore,
+            key: str,
+            block_size: int = 1000,
+            start: Optional[LexoRank] = None,
+            refill_at: int = 100,
+            background: bool = True
+    ):
+        if block_size <= 0:
+            raise ValueError("block_size should be positive")
+        self.store = store
+        self.key = key
+        self.block_size = block_size
+        # Last rank of the list when its first block is reserved
+        self.start = start if start is not None else LexoRank.min(system=store.system)
+        self.refill_at = refill_at
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lexo-rank-refill") \
+            if background else None
+
+    def __enter__(self) -> "LexoRankAllocator":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def next_rank(self) -> LexoRank:
+        """ Next rank of the block of the calling thread """
+        local = self._local
+        if not getattr(local, "remaining", 0):
+            pending: Optional[Future] = getattr(local, "pending", None)
+            local.pending = None
+            low, high = pending.result() if pending is not None else self._reserve()
+            local.ranks = self._mint(low, high)
+            local.remaining = self.block_size
+        local.remaining -= 1
+        if self._executor is not None and local.remaining == self.refill_at:
+            local.pending = self._executor.submit(self._reserve)
+        return next(local.ranks)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _reserve(self) -> Tuple[str, str]:
+        return self.store.reserve(self.key, self.block_size, self.start.value)
+
+    def _mint(self, low: str, high: str) -> Iterator[LexoRank]:
+        low_rank = LexoRank.parse(low, system=self.store.system)
+        high_rank = LexoRank.parse(high, system=self.store.system)
+        bucket = low_rank.bucket
+        for decimal in LexoRank._spread_decimal(
+                low_rank.decimal, high_rank.decimal, self.block_size
+        ):
+            yield LexoRank(bucket, decimal)
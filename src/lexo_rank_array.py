@@ -0,0 +1,195 @@
+"""
+File:           lexo_rank_array.py
+Created on:     18/10/26, 8:13 pm
+
+Sorted ranks kept in their binary form (LexoRankCodec) in one contiguous buffer, with an
+offsets array marking where every rank starts. Position lookups and bisects work on the
+buffer directly, LexoRank objects are only built when a rank is read out.
+
+File layout written by RankArray.save (all integers little endian):
+    magic b"LXRA" | base: uint32 | count: uint64 | offsets: (count + 1) * uint32 | data
+"""
+import mmap
+import struct
+import sys
+from array import array
+from typing import Iterator, Optional, Union
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank
+from src.lexo_rank_codec import LexoRankCodec
+
+
+class RankArray:
+    """ Memory compact, binary searchable and append only container of sorted ranks """
+    MAGIC = b"LXRA"
+    HEADER = struct.Struct("<4sIQ")
+    # 32 bit offsets cap the rank data of one array at 4 GiB
+    OFFSET_TYPE = "I"
+
+    def __init__(self, system: Optional[LexoNumeralSystem] = None):
+        self.system = system if system is not None else LexoRank.NUMERAL_SYSTEM
+        self._data: Union[bytearray, mmap.mmap] = bytearray()
+        # Start of the rank data inside _data, non zero for a memory mapped file
+        self._data_start = 0
+        self._offsets = array(RankArray.OFFSET_TYPE, [0])
+        self._mmap: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[LexoRank, "RankArray"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("RankArray slices do not support a step")
+            return self._copy(start, max(start, stop))
+        return LexoRank.from_bytes(self.key_at(index), self.system)
+
+    def __iter__(self) -> Iterator[LexoRank]:
+        for index in range(len(self)):
+            yield LexoRank.from_bytes(self.key_at(index), self.system)
+
+    def __enter__(self) -> "RankArray":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def key_at(self, index: int) -> bytes:
+        """ Binary form of the rank at index """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RankArray index out of range")
+        return bytes(self._slice(index))
+
+    def append(self, rank: Union[LexoRank, str]):
+        """
+        Append a rank, which has to sort after the last rank of the array. A string has to
+        be a canonical rank, anything else raises ValueError and the array is left as it was.
+        """
+        if self._mmap is not None:
+            raise ValueError("RankArray loaded from a file is read only")
+        key = self._key(rank)
+        if len(self) and key <= self.key_at(-1):
+            raise ValueError(f"Ranks are not sorted: {rank} after {self[-1]}")
+        self._data += key
+        self._offsets.append(len(self._data))
+
+    def extend(self, ranks):
+        for rank in ranks:
+            self.append(rank)
+
+    def bisect_left(self, rank: Union[LexoRank, str]) -> int:
+        """ Position of the first rank that is not lower than rank """
+        key = self._key(rank)
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self._slice(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def bisect_right(self, rank: Union[LexoRank, str]) -> int:
+        """ Position after the last rank that is not higher than rank """
+        key = self._key(rank)
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if key < self._slice(mid):
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def index(self, rank: Union[LexoRank, str]) -> int:
+        position = self.bisect_left(rank)
+        if position < len(self) and self.key_at(position) == self._key(rank):
+            return position
+        raise ValueError(f"{rank} is not in RankArray")
+
+    def __contains__(self, rank: Union[LexoRank, str]) -> bool:
+        try:
+            self.index(rank)
+        except ValueError:
+            return False
+        return True
+
+    def save(self, path: str):
+        offsets = self._offsets if sys.byteorder == "little" else self._swapped(self._offsets)
+        with open(path, "wb") as file:
+            file.write(RankArray.HEADER.pack(RankArray.MAGIC, self.system.get_base, len(self)))
+            file.write(offsets)
+            file.write(self._data[self._data_start:])
+
+    @staticmethod
+    def load(path: str, system: Optional[LexoNumeralSystem] = None) -> "RankArray":
+        """ Memory map a saved array. Nothing is copied, the array is read only """
+        rank_array = RankArray(system)
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, base, count = RankArray.HEADER.unpack_from(mapped)
+        if magic != RankArray.MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a RankArray file")
+        if base != rank_array.system.get_base:
+            mapped.close()
+            raise ValueError(f"{path} holds base {base} ranks, not {rank_array.system.get_base}")
+        data_start = RankArray.HEADER.size + (count + 1) * 4
+        offsets = memoryview(mapped)[RankArray.HEADER.size:data_start]
+        if sys.byteorder == "little":
+            rank_array._offsets = offsets.cast(RankArray.OFFSET_TYPE)
+        else:
+            rank_array._offsets = RankArray._swapped(
+                array(RankArray.OFFSET_TYPE, offsets.tobytes())
+            )
+            offsets.release()
+        rank_array._data = mapped
+        rank_array._data_start = data_start
+        rank_array._mmap = mapped
+        return rank_array
+
+    def close(self):
+        """ Release the memory map of a loaded array """
+        if self._mmap is not None:
+            if isinstance(self._offsets, memoryview):
+                self._offsets.release()
+            self._mmap.close()
+            self._mmap = None
+            self._data = bytearray()
+            self._data_start = 0
+            self._offsets = array(RankArray.OFFSET_TYPE, [0])
+
+    def _key(self, rank: Union[LexoRank, str]) -> bytes:
+        if isinstance(rank, LexoRank):
+            if rank.system != self.system:
+                raise ValueError(f"{rank} is not a rank of {self.system}")
+            return rank.to_bytes()
+        # encode rejects strings that are not canonical ranks
+        return LexoRankCodec.encode(rank, self.system)
+
+    def _slice(self, index: int) -> Union[bytes, bytearray]:
+        """ Binary form of the rank at a valid index, read straight from the buffer """
+        return self._data[
+            self._data_start + self._offsets[index]:self._data_start + self._offsets[index + 1]
+        ]
+
+    def _copy(self, start: int, stop: int) -> "RankArray":
+        rank_array = RankArray(self.system)
+        base = self._offsets[start]
+        rank_array._data = bytearray(
+            self._data[self._data_start + base:self._data_start + self._offsets[stop]]
+        )
+        rank_array._offsets = array(
+            RankArray.OFFSET_TYPE, (offset - base for offset in self._offsets[start:stop + 1])
+        )
+        return rank_array
+
+    @staticmethod
+    def _swapped(offsets: array) -> array:
+        swapped = array(RankArray.OFFSET_TYPE, offsets)
+        swapped.byteswap()
+        return swapped
@@ -0,0 +1,107 @@
+"""
+File:           lexo_rank_block_store.py
+Created on:     18/10/26, 8:16 pm
+
+Stores that hand out disjoint blocks of ranks, the "hi" half of a hi-lo allocator. A store
+keeps the high end of the last block reserved for every key (usually one key per list),
+and every reservation moves it forward atomically.
+"""
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank, RebalanceNeededError
+
+
+class RankBlockStore(ABC):
+    """ Base class of the block stores """
+    # Distance between two ranks of a block, the step gen_next takes
+    STEP = 8
+
+    def __init__(self, system: Optional[LexoNumeralSystem] = None):
+        self.system = system if system is not None else LexoRank.NUMERAL_SYSTEM
+
+    @abstractmethod
+    def reserve(self, key: str, size: int, start: str) -> Tuple[str, str]:
+        """
+        Reserve a block of size ranks for key and return its (low, high) bounds, both
+        exclusive. start is the low bound of the first block ever reserved for key.
+        """
+
+    def advance(self, low: str, size: int) -> str:
+        """ High bound of a block of size ranks that starts after low """
+        low_rank = LexoRank.parse(low, system=self.system)
+        if low_rank.is_max():
+            raise RebalanceNeededError(f"No rank left after {low}")
+        high = low_rank.decimal.ceil().value + size * self.STEP
+        max_decimal = LexoRank.get_max_decimal(self.system)
+        if high >= max_decimal.floor().value:
+            return LexoRank.make_from(low_rank.bucket, max_decimal).value
+        return LexoRank.make_from(
+            low_rank.bucket, LexoRank._integer_decimal(self.system, high)
+        ).value
+
+
+class InMemoryRankBlockStore(RankBlockStore):
+    """ Block store of a single process, shared by its threads """
+
+    def __init__(self, system: Optional[LexoNumeralSystem] = None):
+        super().__init__(system)
+        self._highs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, size: int, start: str) -> Tuple[str, str]:
+        with self._lock:
+            low = self._highs.get(key, start)
+            high = self._highs[key] = self.advance(low, size)
+        return low, high
+
+
+class SqliteRankBlockStore(RankBlockStore):
+    """
+    Block store backed by a SQLite table. Reservations run in an immediate transaction, so
+    processes sharing the database file never get overlapping blocks.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            table: str = "lexo_rank_blocks",
+            system: Optional[LexoNumeralSystem] = None
+    ):
+        super().__init__(system)
+        if not table.isidentifier():
+            raise ValueError(f"Not a valid table name {table}")
+        self.table = table
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, high TEXT NOT NULL)"
+        )
+
+    def reserve(self, key: str, size: int, start: str) -> Tuple[str, str]:
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    f"SELECT high FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                low = row[0] if row is not None else start
+                high = self.advance(low, size)
+                connection.execute(
+                    f"INSERT INTO {self.table} (key, high) VALUES (?, ?) "
+                    f"ON CONFLICT (key) DO UPDATE SET high = excluded.high",
+                    (key, high)
+                )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        return low, high
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
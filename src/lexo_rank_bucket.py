@@ -3,7 +3,7 @@ File:           lexo_rank_bucket.py
 Author:         Dibyaranjan Sathua
 Created on:     27/12/21, 8:31 pm
 """
-from typing import Optional, List
+from typing import Optional, List, Dict
 from src.lexo_integer import LexoInteger
 from src.lexo_numeral_system import LexoNumeralSystem
 
@@ -14,6 +14,7 @@ class LexoRankBucket:
     _BUCKET_1: Optional["LexoRankBucket"] = None
     _BUCKET_2: Optional["LexoRankBucket"] = None
     _VALUES: List["LexoRankBucket"] = []
+    _BY_STRING: Dict[str, "LexoRankBucket"] = {}
 
     def __init__(self, value: str):
         self.value = LexoInteger.parse(value, LexoNumeralSystem())
@@ -80,6 +81,13 @@ class LexoRankBucket:
 
     @staticmethod
     def make_from(string: str) -> "LexoRankBucket":
+        if not LexoRankBucket._BY_STRING:
+            LexoRankBucket._BY_STRING = {
+                str(bucket): bucket for bucket in LexoRankBucket.get_values()
+            }
+        bucket = LexoRankBucket._BY_STRING.get(string)
+        if bucket is not None:
+            return bucket
         value = LexoInteger.parse(string, LexoNumeralSystem())
         for bucket in LexoRankBucket.get_values():
             if bucket.value == value:
@@ -0,0 +1,88 @@
+"""
+File:           lexo_rank_bulk_rebalancer.py
+Created on:     18/10/26, 8:17 pm
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank_bucket import LexoRankBucket
+from src.lexo_rank_rebalancer import LexoRankRebalancer
+
+# (list_id, [(old, new), ...], error): the pairs are empty when the list failed
+ListResult = Tuple[Hashable, List[Tuple[str, str]], Optional[Exception]]
+
+
+class LexoRankBulkRebalancer:
+    """
+    Rebalance many independent lists on a process pool. Each list is moved to the next
+    bucket by LexoRankRebalancer in a worker process. Results are yielded as soon as a list
+    is done, in completion order. At most max_in_flight lists are submitted at any time, so
+    memory use does not depend on the number of lists. Ranks travel between processes as one
+    newline joined string per list rather than as pickled rank objects. A list that fails,
+    e.g. because its ranks are not sorted, is yielded with its error and the other lists
+    carry on.
+    """
+
+    def __init__(
+            self,
+            processes: Optional[int] = None,
+            max_in_flight: Optional[int] = None,
+            system: Optional[LexoNumeralSystem] = None,
+            executor: Optional[Executor] = None
+    ):
+        self.processes = processes
+        self.max_in_flight = max_in_flight
+        self.system = system
+        # An executor given by the caller is used as is and not shut down
+        self.executor = executor
+
+    def rebalance(self, lists: Iterable[Tuple[Hashable, Iterable[str]]]) -> Iterator[ListResult]:
+        """ Yield (list_id, [(old, new), ...], error) for every (list_id, sorted_ranks) """
+        executor = self.executor if self.executor is not None \
+            else ProcessPoolExecutor(self.processes)
+        max_in_flight = self.max_in_flight
+        if max_in_flight is None:
+            max_in_flight = 2 * (self.processes or os.cpu_count() or 1)
+        in_flight: Dict[Future, Tuple[Hashable, str]] = {}
+        try:
+            for list_id, ranks in lists:
+                if len(in_flight) >= max_in_flight:
+                    yield from LexoRankBulkRebalancer._collect(in_flight)
+                payload = "\n".join(ranks)
+                future = executor.submit(
+                    LexoRankBulkRebalancer._rebalance_list, payload, self.system
+                )
+                in_flight[future] = (list_id, payload)
+            while in_flight:
+                yield from LexoRankBulkRebalancer._collect(in_flight)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if self.executor is None:
+                executor.shutdown(wait=True)
+
+    @staticmethod
+    def _collect(in_flight: Dict[Future, Tuple[Hashable, str]]) -> Iterator[ListResult]:
+        """ Wait for at least one list and yield the results of all finished lists """
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            list_id, payload = in_flight.pop(future)
+            try:
+                new_ranks = future.result()
+            except Exception as error:
+                yield list_id, [], error
+                continue
+            old_ranks = payload.split("\n") if payload else []
+            yield list_id, list(zip(old_ranks, new_ranks.split("\n") if new_ranks else [])), None
+
+    @staticmethod
+    def _rebalance_list(payload: str, system: Optional[LexoNumeralSystem]) -> str:
+        """ Worker side: newline joined source ranks in, newline joined new ranks out """
+        if not payload:
+            return ""
+        ranks = payload.split("\n")
+        bucket = LexoRankBucket.make_from(ranks[0].partition("|")[0])
+        rebalancer = LexoRankRebalancer(bucket, len(ranks), system=system)
+        return "\n".join(new for _, new in rebalancer.rebalance(ranks))
@@ -0,0 +1,61 @@
+"""
+File:           lexo_rank_codec.py
+Created on:     18/10/26, 8:12 pm
+
+Order preserving binary encoding of rank strings.
+
+Every digit of the bucket, the integer part and the fraction is stored as digit + 1 in a
+fixed number of bits (6 bits for base 36), packed big endian and padded with zero bits to
+a whole byte. The separators are dropped as they are always at the same position. Since
+no stored group is zero, a shorter fraction compares lower exactly like a shorter string
+does, so comparing the bytes gives the same order as comparing the rank strings.
+"""
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank
+
+
+class LexoRankCodec:
+    """ Encode rank strings to bytes and back """
+
+    @staticmethod
+    def bits_per_digit(system: LexoNumeralSystem) -> int:
+        return system.get_base.bit_length()
+
+    @staticmethod
+    def encode(rank: str, system: LexoNumeralSystem) -> bytes:
+        """ Encode a canonical rank string, anything else raises ValueError """
+        if not LexoRank.is_canonical(rank, system):
+            raise ValueError(f"{rank!r} is not a canonical rank")
+        return LexoRankCodec.pack(rank, system)
+
+    @staticmethod
+    def pack(rank: str, system: LexoNumeralSystem) -> bytes:
+        """ Encode a rank string that is known to be canonical, without checking it """
+        bucket, _, decimal = rank.partition("|")
+        digits = bucket + decimal.replace(system.radix_point_char, "", 1)
+        bits = LexoRankCodec.bits_per_digit(system)
+        value = 0
+        for ch in digits:
+            value = (value << bits) | (system.to_digit(ch) + 1)
+        total_bits = len(digits) * bits
+        size = (total_bits + 7) // 8
+        return (value << (size * 8 - total_bits)).to_bytes(size, "big")
+
+    @staticmethod
+    def decode(data: bytes, system: LexoNumeralSystem) -> str:
+        """ Decode bytes produced by encode back to the rank string """
+        bits = LexoRankCodec.bits_per_digit(system)
+        count = len(data) * 8 // bits
+        value = int.from_bytes(data, "big") >> (len(data) * 8 - count * bits)
+        mask = (1 << bits) - 1
+        digits = []
+        for shift in range((count - 1) * bits, -1, -bits):
+            group = (value >> shift) & mask
+            if not group:
+                break
+            digits.append(system.to_char(group - 1))
+        if len(digits) < LexoRank.INTEGER_DIGITS + 1:
+            raise ValueError("Not an encoded rank")
+        integer_end = LexoRank.INTEGER_DIGITS + 1
+        return digits[0] + "|" + "".join(digits[1:integer_end]) + system.radix_point_char + \
+            "".join(digits[integer_end:])
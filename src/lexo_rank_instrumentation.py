@@ -0,0 +1,142 @@
+"""
+File:           lexo_rank_instrumentation.py
+Created on:     18/10/26, 8:18 pm
+
+Opt-in profiling of the rank hot paths. enable() wraps the instrumented methods in place
+and disable() puts the original functions back, so while disabled nothing is added to any
+call. Counters are plain dicts updated without locking, which is fine for metrics but can
+lose an increment now and then when several threads are busy.
+"""
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+from src.lexo_decimal import LexoDecimal
+from src.lexo_integer import LexoInteger
+from src.lexo_rank import LexoRank
+
+Snapshot = Dict[str, Dict]
+
+
+class LexoRankInstrumentation:
+    """ Counts, timings and histograms of the rank operations """
+    # (class, method, whether the length of the returned rank is recorded)
+    TARGETS: List[Tuple[type, str, bool]] = [
+        (LexoRank, "between", True),
+        (LexoRank, "gen_next", True),
+        (LexoRank, "gen_prev", True),
+        (LexoRank, "parse", False),
+        (LexoRank, "between_decimal", False),
+        (LexoInteger, "make", False),
+        (LexoInteger, "add", False),
+        (LexoInteger, "subtract", False),
+        (LexoInteger, "multiply", False),
+    ]
+    timer: Callable[[], float] = time.perf_counter
+    _originals: Dict[Tuple[type, str], object] = {}
+    # Operation name to [count, total seconds, max seconds]
+    _operations: Dict[str, List] = {}
+    _rank_lengths: Dict[int, int] = {}
+    _set_scale_iterations: Dict[int, int] = {}
+    _set_scale_calls = 0
+
+    @staticmethod
+    def enable():
+        if LexoRankInstrumentation._originals:
+            return
+        for cls, name, record_length in LexoRankInstrumentation.TARGETS:
+            LexoRankInstrumentation._wrap(cls, name, record_length)
+        LexoRankInstrumentation._wrap_set_scale()
+
+    @staticmethod
+    def disable():
+        for (cls, name), original in LexoRankInstrumentation._originals.items():
+            setattr(cls, name, original)
+        LexoRankInstrumentation._originals.clear()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return bool(LexoRankInstrumentation._originals)
+
+    @staticmethod
+    def snapshot() -> Snapshot:
+        """
+        Copy of the collected data: per operation count, total and max seconds, and the
+        histograms of the output rank lengths and the set_scale calls per between_decimal.
+        """
+        return {
+            "operations": {
+                name: {"count": count, "total_seconds": total, "max_seconds": longest}
+                for name, (count, total, longest) in LexoRankInstrumentation._operations.items()
+            },
+            "histograms": {
+                "rank_length": dict(sorted(LexoRankInstrumentation._rank_lengths.items())),
+                "set_scale_iterations": dict(
+                    sorted(LexoRankInstrumentation._set_scale_iterations.items())
+                ),
+            },
+        }
+
+    @staticmethod
+    def reset():
+        LexoRankInstrumentation._operations.clear()
+        LexoRankInstrumentation._rank_lengths.clear()
+        LexoRankInstrumentation._set_scale_iterations.clear()
+
+    @staticmethod
+    def export(exporter: Callable[[Snapshot], None], reset: bool = True):
+        """ Hand a snapshot to exporter, e.g. to push it to a metrics pipeline """
+        snapshot = LexoRankInstrumentation.snapshot()
+        if reset:
+            LexoRankInstrumentation.reset()
+        exporter(snapshot)
+
+    @staticmethod
+    def _wrap(cls: type, name: str, record_length: bool):
+        original = cls.__dict__[name]
+        is_static = isinstance(original, staticmethod)
+        function = original.__func__ if is_static else original
+        operation = f"{cls.__name__}.{name}"
+        is_between_decimal = cls is LexoRank and name == "between_decimal"
+        instrumentation = LexoRankInstrumentation
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if is_between_decimal:
+                calls_before = instrumentation._set_scale_calls
+            start = instrumentation.timer()
+            result = function(*args, **kwargs)
+            elapsed = instrumentation.timer() - start
+            stats = instrumentation._operations.get(operation)
+            if stats is None:
+                stats = instrumentation._operations[operation] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+            if record_length:
+                length = len(result.value)
+                instrumentation._rank_lengths[length] = \
+                    instrumentation._rank_lengths.get(length, 0) + 1
+            if is_between_decimal:
+                iterations = instrumentation._set_scale_calls - calls_before
+                instrumentation._set_scale_iterations[iterations] = \
+                    instrumentation._set_scale_iterations.get(iterations, 0) + 1
+            return result
+
+        LexoRankInstrumentation._originals[(cls, name)] = original
+        setattr(cls, name, staticmethod(wrapper) if is_static else wrapper)
+
+    @staticmethod
+    def _wrap_set_scale():
+        """ set_scale is only counted, it is too cheap to be timed on its own """
+        original = LexoDecimal.__dict__["set_scale"]
+        instrumentation = LexoRankInstrumentation
+
+        @wraps(original)
+        def wrapper(*args, **kwargs):
+            instrumentation._set_scale_calls += 1
+            return original(*args, **kwargs)
+
+        LexoRankInstrumentation._originals[(LexoDecimal, "set_scale")] = original
+        LexoDecimal.set_scale = wrapper
@@ -0,0 +1,92 @@
+"""
+File:           lexo_rank_migration.py
+Created on:     18/10/26, 8:18 pm
+"""
+import heapq
+from typing import Iterable, Iterator, Optional, Tuple
+
+from src.lexo_decimal import LexoDecimal
+from src.lexo_rank import LexoRank, RebalanceNeededError
+from src.lexo_rank_rebalancer import LexoRankRebalancer
+
+
+class LexoRankMigration:
+    """
+    Operations on a list while a LexoRankRebalancer moves it to the next bucket. The
+    rebalancer walks the source bucket in ascending order, so at any time the list is the
+    migrated ranks of the target bucket followed by the ranks still in the source bucket.
+
+    New items next to a migrated item go to the target bucket, below the rank the
+    rebalancer gives to the next source rank. New items after an unmigrated item can only
+    stay in the source bucket, and are migrated when the rebalancer reaches them. Each one
+    uses up one rank of headroom: the rebalancer count minus size, the number of ranks the
+    list had when the rebalance started. Once the headroom is used up such an insert raises
+    RebalanceNeededError instead of making the rebalancer fail halfway through.
+    """
+
+    def __init__(self, rebalancer: LexoRankRebalancer, size: Optional[int] = None):
+        self.rebalancer = rebalancer
+        self.source = rebalancer.bucket
+        self.target = rebalancer.target_bucket
+        self.system = rebalancer.system
+        # Without a size there is no headroom for new unmigrated ranks
+        self.size = size if size is not None else rebalancer.count
+        self.source_inserts = 0
+
+    def key(self, rank: LexoRank) -> Tuple[int, str]:
+        """ Sort key of a rank in the logical order: migrated ranks first """
+        self._check(rank)
+        return (0 if rank.bucket == self.target else 1), rank.value
+
+    def merged(self, *streams: Iterable[LexoRank]) -> Iterator[LexoRank]:
+        """
+        Lazily merge rank streams, each sorted in the logical order, e.g. one stream per
+        bucket straight from the database.
+        """
+        return heapq.merge(*streams, key=self.key)
+
+    def between(self, left: Optional[LexoRank], right: Optional[LexoRank]) -> LexoRank:
+        """
+        Rank for a new item between two neighbours in the logical order, None standing for
+        the head or the tail of the list.
+        """
+        if left is not None and right is not None and self.key(left) >= self.key(right):
+            raise ValueError(f"{left} is not before {right} in the migrating list")
+        if left is not None and left.bucket == self.source:
+            if self.size + self.source_inserts >= self.rebalancer.count:
+                raise RebalanceNeededError(
+                    f"No headroom left in the rebalance of {self.rebalancer.count} ranks"
+                )
+            rank = left.gen_next() if right is None else left.between(right)
+            self.source_inserts += 1
+            return rank
+        if right is not None and right.bucket == self.target:
+            return right.gen_prev() if left is None else left.between(right)
+        # Between the last migrated rank and the first unmigrated one
+        low = left.decimal if left is not None else LexoRank.get_min_decimal(self.system)
+        decimal = LexoRank.between_decimal(low, self._next_target())
+        return LexoRank.make_from(self.target, decimal)
+
+    def gen_next(self, rank: LexoRank) -> LexoRank:
+        """ Rank for a new item after rank, the last item of the list """
+        return self.between(rank, None)
+
+    def gen_prev(self, rank: LexoRank) -> LexoRank:
+        """ Rank for a new item before rank, the first item of the list """
+        return self.between(None, rank)
+
+    def _next_target(self) -> LexoDecimal:
+        """ Decimal the rebalancer gives to the next source rank """
+        checkpoint = self.rebalancer.checkpoint
+        targets = LexoRank._spread_decimal(
+            LexoRank.get_min_decimal(self.system),
+            LexoRank.get_max_decimal(self.system),
+            self.rebalancer.count,
+            start=checkpoint.processed
+        )
+        return next(targets, LexoRank.get_max_decimal(self.system))
+
+    def _check(self, rank: LexoRank):
+        bucket = rank.bucket
+        if not (bucket == self.source or bucket == self.target):
+            raise ValueError(f"Rank {rank} is not in bucket {self.source} or {self.target}")
@@ -0,0 +1,101 @@
+"""
+File:           lexo_rank_move_planner.py
+Created on:     18/10/26, 8:15 pm
+"""
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+
+RankBound = Union[LexoRank, str, None]
+Move = Tuple[Hashable, RankBound, RankBound]
+
+
+class LexoRankMovePlanner:
+    """
+    Resolve a batch of moves into rank updates. A move is (item, before_rank, after_rank):
+    the item goes right after before_rank and right before after_rank, where None stands
+    for the head or the tail of the list. Moves that share a gap get evenly spaced ranks
+    from one between_many call, in the order they appear in the batch. Gaps of one batch
+    must not overlap, a batch with overlapping gaps is rejected with a ValueError.
+    """
+
+    @staticmethod
+    def plan(
+            moves: Iterable[Move],
+            bucket: Optional[LexoRankBucket] = None,
+            system: Optional[LexoNumeralSystem] = None,
+            max_length: Optional[int] = None,
+            current_ranks: Optional[Mapping[Hashable, LexoRank]] = None
+    ) -> List[Tuple[Hashable, LexoRank]]:
+        """
+        Return one (item, new_rank) update per moved item. When an item is moved more than
+        once in the batch, only its last move counts. With current_ranks, the moves of a gap
+        whose items already sit inside it in the requested order produce no updates.
+        """
+        if bucket is None:
+            bucket = LexoRankBucket.get_bucket_0()
+        last_moves: Dict[Hashable, Move] = {}
+        for move in moves:
+            last_moves.pop(move[0], None)
+            last_moves[move[0]] = move
+
+        gaps: Dict[Tuple[str, str], Tuple[LexoRank, LexoRank, List[Hashable]]] = {}
+        for item, before_rank, after_rank in last_moves.values():
+            left = LexoRankMovePlanner._bound(before_rank, system) \
+                if before_rank is not None else LexoRank.min(bucket, system)
+            right = LexoRankMovePlanner._bound(after_rank, system) \
+                if after_rank is not None else LexoRank.max(bucket, system)
+            if left.compare_to(right) >= 0:
+                raise ValueError(f"Gap of {item!r} is empty: {left} is not before {right}")
+            gap = gaps.setdefault((left.value, right.value), (left, right, []))
+            gap[2].append(item)
+
+        LexoRankMovePlanner._check_overlaps(gaps.values())
+        updates = []
+        for left, right, items in gaps.values():
+            if current_ranks is not None and \
+                    LexoRankMovePlanner._in_place(left, right, items, current_ranks):
+                continue
+            ranks = left.between_many(right, len(items), max_length=max_length)
+            updates.extend(zip(items, ranks))
+        return updates
+
+    @staticmethod
+    def _check_overlaps(gaps: Iterable[Tuple[LexoRank, LexoRank, List[Hashable]]]):
+        """
+        Gaps of a batch may share a bound but not overlap. In overlapping gaps, such as
+        (A, C) and (B, C), the spreads of the gaps would interleave or land on a bound.
+        """
+        previous = None
+        for left, right, items in sorted(gaps, key=lambda gap: (gap[0].value, gap[1].value)):
+            if previous is not None and left.value < previous[1].value:
+                raise ValueError(
+                    f"Gap ({left}, {right}) of {items!r} overlaps gap "
+                    f"({previous[0]}, {previous[1]}) of {previous[2]!r}"
+                )
+            if previous is None or right.value > previous[1].value:
+                previous = (left, right, items)
+
+    @staticmethod
+    def _in_place(
+            left: LexoRank,
+            right: LexoRank,
+            items: List[Hashable],
+            current_ranks: Mapping[Hashable, LexoRank]
+    ) -> bool:
+        """ Whether the items are already strictly inside the gap, in batch order """
+        previous = left
+        for item in items:
+            rank = current_ranks.get(item)
+            if rank is None or previous.compare_to(rank) >= 0:
+                return False
+            previous = rank
+        return previous.compare_to(right) < 0
+
+    @staticmethod
+    def _bound(rank: Union[LexoRank, str], system: Optional[LexoNumeralSystem]) -> LexoRank:
+        if isinstance(rank, LexoRank):
+            return rank
+        return LexoRank.parse(rank, system=system)
@@ -0,0 +1,237 @@
+"""
+File:           lexo_rank_numpy.py
+Created on:     18/10/26, 8:21 pm
+
+Vectorized operations on whole arrays of rank strings, for analytics over large tables.
+Needs numpy, which is an optional dependency of the package.
+
+Ranks are held as a packed numpy bytes array ("S" dtype): one fixed width row of ASCII
+bytes per rank, padded with NUL bytes. Canonical rank strings sort bytewise, and NUL sorts
+before every digit, so comparing, sorting and searching the packed array gives the rank
+order without parsing anything.
+"""
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+
+# Bucket, "|", the integer digits and the radix point
+PREFIX_LENGTH = LexoRank.INTEGER_DIGITS + 3
+
+
+class LexoRankNumpy:
+    """ Batch parsing, comparison, validation and statistics of rank arrays """
+    _LOOKUPS: Dict[LexoNumeralSystem, "np.ndarray"] = {}
+
+    @staticmethod
+    def pack(ranks: Union[Iterable[str], "np.ndarray"]) -> "np.ndarray":
+        """ Packed bytes array of rank strings """
+        LexoRankNumpy._require()
+        if isinstance(ranks, np.ndarray):
+            packed = ranks if ranks.dtype.kind == "S" else ranks.astype("S")
+        else:
+            packed = np.array(list(ranks), dtype="S")
+        return np.ascontiguousarray(packed)
+
+    @staticmethod
+    def lookup(system: Optional[LexoNumeralSystem] = None) -> "np.ndarray":
+        """ Table from an ASCII byte to its digit + 1, 0 for bytes that are not digits """
+        LexoRankNumpy._require()
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        table = LexoRankNumpy._LOOKUPS.get(system)
+        if table is None:
+            table = np.zeros(256, dtype=np.uint8)
+            for digit, ch in enumerate(system.digits):
+                table[ord(ch)] = digit + 1
+            LexoRankNumpy._LOOKUPS[system] = table
+        return table
+
+    @staticmethod
+    def byte_matrix(ranks: Union[Iterable[str], "np.ndarray"]) -> "np.ndarray":
+        """ uint8 matrix with one row of ASCII bytes per rank, at least PREFIX_LENGTH wide """
+        packed = LexoRankNumpy.pack(ranks)
+        if packed.dtype.itemsize < PREFIX_LENGTH:
+            packed = packed.astype(f"S{PREFIX_LENGTH}")
+        return packed.view(np.uint8).reshape(len(packed), packed.dtype.itemsize)
+
+    @staticmethod
+    def digit_matrix(
+            ranks: Union[Iterable[str], "np.ndarray"], system: Optional[LexoNumeralSystem] = None
+    ) -> "np.ndarray":
+        """
+        uint8 matrix with the bucket, integer and fraction digits of every rank, stored as
+        digit + 1 like LexoRankCodec does, so 0 only appears as padding after the fraction
+        """
+        chars = LexoRankNumpy.byte_matrix(ranks)
+        digits = LexoRankNumpy.lookup(system)[chars]
+        return np.delete(digits, [1, PREFIX_LENGTH - 1], axis=1)
+
+    @staticmethod
+    def is_valid(
+            ranks: Union[Iterable[str], "np.ndarray"], system: Optional[LexoNumeralSystem] = None
+    ) -> "np.ndarray":
+        """ Boolean array telling which ranks are canonical rank strings """
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        packed = LexoRankNumpy.pack(ranks)
+        chars = LexoRankNumpy.byte_matrix(packed)
+        table = LexoRankNumpy.lookup(system)
+        lengths = LexoRankNumpy.lengths(packed)
+        buckets = np.array([ord(str(bucket)) for bucket in LexoRankBucket.get_values()])
+        valid = np.isin(chars[:, 0], buckets)
+        valid &= chars[:, 1] == ord("|")
+        valid &= (table[chars[:, 2:PREFIX_LENGTH - 1]] > 0).all(axis=1)
+        valid &= chars[:, PREFIX_LENGTH - 1] == ord(system.radix_point_char)
+        fraction = chars[:, PREFIX_LENGTH:]
+        valid &= ((table[fraction] > 0) | (fraction == 0)).all(axis=1)
+        valid &= lengths >= PREFIX_LENGTH
+        # Padding only follows the string, and a fraction never ends with a zero digit
+        valid &= lengths == (chars != 0).sum(axis=1)
+        last = chars[np.arange(len(chars)), np.maximum(lengths, 1) - 1]
+        valid &= (lengths == PREFIX_LENGTH) | (last != ord(system.to_char(0)))
+        # The max decimal has no fraction, so only a fraction after its integer part is above it
+        top = (chars[:, 2:PREFIX_LENGTH - 1] == ord(system.digits[-1])).all(axis=1)
+        valid &= ~top | (lengths == PREFIX_LENGTH)
+        return valid
+
+    @staticmethod
+    def lengths(ranks: Union[Iterable[str], "np.ndarray"]) -> "np.ndarray":
+        return np.char.str_len(LexoRankNumpy.pack(ranks))
+
+    @staticmethod
+    def compare(
+            a: Union[Iterable[str], "np.ndarray"], b: Union[Iterable[str], "np.ndarray"]
+    ) -> "np.ndarray":
+        """ Elementwise compare_to: -1, 0 or 1 per pair of ranks """
+        a = LexoRankNumpy.pack(a)
+        b = LexoRankNumpy.pack(b)
+        return (a > b).astype(np.int8) - (a < b).astype(np.int8)
+
+    @staticmethod
+    def argsort(ranks: Union[Iterable[str], "np.ndarray"]) -> "np.ndarray":
+        return np.argsort(LexoRankNumpy.pack(ranks), kind="stable")
+
+    @staticmethod
+    def searchsorted(
+            sorted_ranks: Union[Iterable[str], "np.ndarray"],
+            ranks: Union[Iterable[str], "np.ndarray"],
+            side: str = "left"
+    ) -> "np.ndarray":
+        """ Positions of ranks in sorted_ranks, like bisect_left or bisect_right """
+        return np.searchsorted(LexoRankNumpy.pack(sorted_ranks), LexoRankNumpy.pack(ranks), side)
+
+    @staticmethod
+    def is_strictly_increasing(ranks: Union[Iterable[str], "np.ndarray"]) -> bool:
+        packed = LexoRankNumpy.pack(ranks)
+        return bool((packed[1:] > packed[:-1]).all())
+
+    @staticmethod
+    def values(
+            ranks: Union[Iterable[str], "np.ndarray"],
+            system: Optional[LexoNumeralSystem] = None,
+            fraction_digits: int = 6
+    ) -> "np.ndarray":
+        """
+        float64 approximation of the decimal of every rank, from the integer digits and
+        the first fraction_digits digits of the fraction. A float64 only holds about 16
+        significant digits, so ranks closer than that round to the same value; gap_stats
+        computes the gaps exactly instead.
+        """
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        integers, fractions = LexoRankNumpy._parts(
+            LexoRankNumpy.pack(ranks), system, fraction_digits
+        )
+        return integers + fractions / float(system.get_base) ** fraction_digits
+
+    @staticmethod
+    def length_stats(ranks: Union[Iterable[str], "np.ndarray"]) -> Dict:
+        """ Count, min, max, mean and percentiles of the rank lengths, and their histogram """
+        lengths = LexoRankNumpy.lengths(ranks)
+        if not len(lengths):
+            return {"count": 0}
+        histogram = np.bincount(lengths)
+        return {
+            "count": int(len(lengths)),
+            "min": int(lengths.min()),
+            "max": int(lengths.max()),
+            "mean": float(lengths.mean()),
+            "p50": float(np.percentile(lengths, 50)),
+            "p90": float(np.percentile(lengths, 90)),
+            "p99": float(np.percentile(lengths, 99)),
+            "histogram": {
+                int(length): int(count) for length, count in enumerate(histogram) if count
+            },
+        }
+
+    @staticmethod
+    def gap_stats(
+            sorted_ranks: Union[Iterable[str], "np.ndarray"],
+            system: Optional[LexoNumeralSystem] = None,
+            fraction_digits: int = 6
+    ) -> Dict:
+        """
+        Statistics of the gaps between neighbouring ranks of the same bucket. Gaps below
+        the resolution of fraction_digits are counted as tight, they are where inserts
+        make ranks grow. The integer and fraction parts are diffed separately as integers,
+        so the tight count is exact and the gaps are only rounded once, to float64.
+        """
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        packed = LexoRankNumpy.pack(sorted_ranks)
+        integers, fractions = LexoRankNumpy._parts(packed, system, fraction_digits)
+        buckets = LexoRankNumpy.byte_matrix(packed)[:, 0]
+        same_bucket = buckets[1:] == buckets[:-1]
+        integer_gaps = np.diff(integers)[same_bucket]
+        fraction_gaps = np.diff(fractions)[same_bucket]
+        if not len(integer_gaps):
+            return {"count": 0}
+        gaps = integer_gaps + fraction_gaps / float(system.get_base) ** fraction_digits
+        return {
+            "count": int(len(gaps)),
+            "min": float(gaps.min()),
+            "max": float(gaps.max()),
+            "mean": float(gaps.mean()),
+            "median": float(np.median(gaps)),
+            # A fraction gap is above -base ** fraction_digits, so any integer gap is not tight
+            "tight": int(((integer_gaps == 0) & (fraction_gaps < 1)).sum()),
+        }
+
+    @staticmethod
+    def _parts(
+            packed: "np.ndarray", system: Optional[LexoNumeralSystem], fraction_digits: int
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        int64 integer part of every rank, and its first fraction_digits fraction digits as
+        an int64, both exact
+        """
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+        if system.get_base ** fraction_digits >= 2 ** 63:
+            raise ValueError(f"{fraction_digits} fraction digits do not fit in an int64")
+        digits = LexoRankNumpy.digit_matrix(packed, system)[:, 1:]
+        width = LexoRank.INTEGER_DIGITS + fraction_digits
+        if digits.shape[1] < width:
+            digits = np.pad(digits, ((0, 0), (0, width - digits.shape[1])))
+        digits = np.maximum(digits[:, :width].astype(np.int64) - 1, 0)
+        integer_weights = system.get_base ** np.arange(
+            LexoRank.INTEGER_DIGITS - 1, -1, -1, dtype=np.int64
+        )
+        fraction_weights = system.get_base ** np.arange(
+            fraction_digits - 1, -1, -1, dtype=np.int64
+        )
+        integers = digits[:, :LexoRank.INTEGER_DIGITS] @ integer_weights
+        fractions = digits[:, LexoRank.INTEGER_DIGITS:] @ fraction_weights
+        return integers, fractions
+
+    @staticmethod
+    def _require():
+        if np is None:
+            raise ImportError("numpy is required for lexo_rank_numpy, install it with pip")
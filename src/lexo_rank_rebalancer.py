@@ -0,0 +1,146 @@
+"""
+File:           lexo_rank_rebalancer.py
+Created on:     18/10/26, 8:05 pm
+"""
+from typing import Optional, Iterable, Iterator, Tuple, Callable, Sequence, List
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_decimal import LexoDecimal
+from src.lexo_rank import LexoRank, RebalanceNeededError
+from src.lexo_rank_bucket import LexoRankBucket
+
+
+class RebalanceCheckpoint:
+    """ Position of a rebalance: the last source rank processed and how many were processed """
+
+    def __init__(self, last_rank: Optional[str] = None, processed: int = 0):
+        self.last_rank = last_rank
+        self.processed = processed
+
+    def __repr__(self):
+        return f"RebalanceCheckpoint(last_rank={self.last_rank!r}, processed={self.processed})"
+
+
+class LexoRankRebalancer:
+    """
+    Move a sorted list of ranks from its bucket to the next bucket, replacing every rank
+    with a compact, evenly spaced one. Ranks are streamed so memory use does not depend
+    on the size of the list. The total count is needed upfront to space the new ranks.
+    """
+
+    def __init__(
+            self,
+            bucket: LexoRankBucket,
+            count: int,
+            checkpoint: Optional[RebalanceCheckpoint] = None,
+            progress: Optional[Callable[[int, int], None]] = None,
+            progress_every: int = 10000,
+            system: Optional[LexoNumeralSystem] = None
+    ):
+        self.bucket = bucket
+        self.system = system
+        self.target_bucket = bucket.next()
+        self.count = count
+        self.checkpoint = checkpoint if checkpoint is not None else RebalanceCheckpoint()
+        self.progress = progress
+        self.progress_every = progress_every
+
+    def rebalance(self, ranks: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (old, new) rank strings. Source ranks up to the checkpoint are skipped, so a
+        resumed rebalance can be fed either the full list or only the remaining ranks.
+        """
+        prefix = str(self.bucket) + "|"
+        checkpoint = self.checkpoint
+        targets = LexoRank._spread_decimal(
+            LexoRank.get_min_decimal(self.system),
+            LexoRank.get_max_decimal(self.system),
+            self.count,
+            start=checkpoint.processed
+        )
+        resume_after = checkpoint.last_rank
+        for rank in ranks:
+            if checkpoint.last_rank is not None and rank <= checkpoint.last_rank:
+                if checkpoint.last_rank == resume_after:
+                    continue
+                raise ValueError(f"Ranks are not sorted: {rank} after {checkpoint.last_rank}")
+            if not rank.startswith(prefix):
+                raise ValueError(f"Rank {rank} is not in bucket {self.bucket}")
+            decimal = next(targets, None)
+            if decimal is None:
+                raise ValueError(f"More than {self.count} ranks to rebalance")
+            checkpoint.last_rank = rank
+            checkpoint.processed += 1
+            if self.progress is not None and checkpoint.processed % self.progress_every == 0:
+                self.progress(checkpoint.processed, self.count)
+            yield rank, LexoRank(self.target_bucket, decimal).value
+        if self.progress is not None and checkpoint.processed % self.progress_every != 0:
+            self.progress(checkpoint.processed, self.count)
+
+    @staticmethod
+    def rebalance_window(
+            ranks: Sequence[LexoRank], max_length: int
+    ) -> List[Tuple[LexoRank, LexoRank]]:
+        """
+        Re-space the smallest windows around the ranks longer than max_length, keeping every
+        rank outside the windows fixed. Only the (old, new) pairs that changed are returned.
+        """
+        current = list(ranks)
+        if not current:
+            return []
+        for prev, rank in zip(current, current[1:]):
+            if not prev.bucket == rank.bucket:
+                raise ValueError("rebalance works on same bucket")
+            if prev.compare_to(rank) >= 0:
+                raise ValueError(f"Ranks are not sorted: {rank} after {prev}")
+        bucket = current[0].bucket
+        max_scale = LexoRank._max_scale(bucket, max_length)
+        changes = []
+        limit = 0
+        index = 0
+        while index < len(current):
+            if len(current[index].value) <= max_length:
+                index += 1
+                continue
+            end = index
+            while end + 1 < len(current) and len(current[end + 1].value) > max_length:
+                end += 1
+            start, end = LexoRankRebalancer._find_window(current, index, end, max_scale, limit)
+            left, right = LexoRankRebalancer._window_bounds(current, start, end)
+            decimals = LexoRank._spread_decimal(left, right, end - start + 1)
+            for position, decimal in enumerate(decimals, start):
+                new_rank = LexoRank(bucket, decimal)
+                if not new_rank == current[position]:
+                    changes.append((current[position], new_rank))
+                    current[position] = new_rank
+            limit = index = end + 1
+        return changes
+
+    @staticmethod
+    def _find_window(
+            ranks: List[LexoRank], start: int, end: int, max_scale: int, limit: int
+    ) -> Tuple[int, int]:
+        """ Grow [start, end] until its ranks can be re-spaced within max_scale """
+        for extra in range(len(ranks) - (end - start)):
+            for left_extra in range(extra + 1):
+                i = start - left_extra
+                j = end + extra - left_extra
+                if i < limit or j >= len(ranks):
+                    continue
+                left, right = LexoRankRebalancer._window_bounds(ranks, i, j)
+                if LexoRank._spread_scale(left, right, j - i + 1) <= max_scale:
+                    return i, j
+        raise RebalanceNeededError(
+            "No window fits within max_length, the bucket needs a full rebalance"
+        )
+
+    @staticmethod
+    def _window_bounds(
+            ranks: List[LexoRank], start: int, end: int
+    ) -> Tuple[LexoDecimal, LexoDecimal]:
+        """ Decimals of the fixed neighbours around ranks[start:end + 1] """
+        system = ranks[start].system
+        left = ranks[start - 1].decimal if start > 0 else LexoRank.get_min_decimal(system)
+        right = ranks[end + 1].decimal if end + 1 < len(ranks) \
+            else LexoRank.get_max_decimal(system)
+        return left, right
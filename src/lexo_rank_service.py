@@ -0,0 +1,172 @@
+"""
+File:           lexo_rank_service.py
+Created on:     18/10/26, 8:16 pm
+"""
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.lexo_rank import LexoRank
+
+GapKey = Tuple[str, str, str]
+
+
+class _Gap:
+    """ Requests waiting for a gap and the last rank handed out in it """
+    __slots__ = ("batch", "low", "high", "waiters", "busy")
+
+    def __init__(self, batch: Callable, low: LexoRank, high: Optional[LexoRank]):
+        self.batch = batch
+        # Every batch starts after the last rank handed out, so ranks are never repeated
+        self.low = low
+        self.high = high
+        self.waiters: List[asyncio.Future] = []
+        # A flush is scheduled or a batch is being computed
+        self.busy = False
+
+
+class AsyncRankService:
+    """
+    asyncio facade of the rank operations. Requests for the same gap that arrive within
+    window seconds are coalesced into one batch, and every caller gets a distinct rank, in
+    the order the requests came in. Batches of one gap run one after the other, each one
+    after the last rank handed out, so later windows never repeat a rank. The state of the
+    last max_gaps gaps is kept; older gaps only keep the last rank handed out in them, which
+    is restored when the gap is requested again. Batches of at least executor_threshold
+    ranks are computed on the executor (the loop default when None) so that the event loop
+    is not blocked.
+    """
+
+    def __init__(
+            self,
+            window: float = 0.001,
+            executor: Optional[Executor] = None,
+            executor_threshold: int = 32,
+            max_length: Optional[int] = None,
+            max_gaps: int = 100000
+    ):
+        self.window = window
+        self.executor = executor
+        self.executor_threshold = executor_threshold
+        self.max_length = max_length
+        self.max_gaps = max_gaps
+        self._gaps: "OrderedDict[GapKey, _Gap]" = OrderedDict()
+        # Last rank handed out in every evicted gap, so that no rank is ever handed out twice
+        self._evicted: Dict[GapKey, LexoRank] = {}
+
+    async def between(self, a: LexoRank, b: LexoRank) -> LexoRank:
+        """ A rank between a and b, distinct from the ranks of other callers """
+        if a.compare_to(b) > 0:
+            a, b = b, a
+        return await self._request(
+            ("between", a.value, b.value), AsyncRankService._between_batch, a, b
+        )
+
+    async def next_after(self, rank: LexoRank) -> LexoRank:
+        """ A rank after rank, distinct from the ranks of other callers """
+        return await self._request(
+            ("next", rank.value, ""), AsyncRankService._next_batch, rank, None
+        )
+
+    def _request(
+            self, key: GapKey, batch: Callable, low: LexoRank, high: Optional[LexoRank]
+    ) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        gap = self._gaps.get(key)
+        if gap is None:
+            low = self._evicted.pop(key, low)
+            gap = self._gaps[key] = _Gap(batch, low, high)
+            self._evict()
+        else:
+            self._gaps.move_to_end(key)
+        gap.waiters.append(future)
+        if not gap.busy:
+            gap.busy = True
+            self._schedule(loop, gap)
+        return future
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop, gap: _Gap):
+        if self.window > 0:
+            loop.call_later(self.window, self._flush, gap)
+        else:
+            loop.call_soon(self._flush, gap)
+
+    def _flush(self, gap: _Gap):
+        waiters = gap.waiters
+        gap.waiters = []
+        args = (gap.low, gap.high, self.max_length, len(waiters))
+        if len(waiters) < self.executor_threshold:
+            try:
+                ranks = gap.batch(*args)
+            except Exception as error:
+                self._done(gap, waiters, error=error)
+                return
+            self._done(gap, waiters, ranks=ranks)
+            return
+        loop = asyncio.get_running_loop()
+        result = loop.run_in_executor(self.executor, gap.batch, *args)
+        result.add_done_callback(lambda done: self._resolved(gap, waiters, done))
+
+    def _resolved(self, gap: _Gap, waiters: List[asyncio.Future], done: asyncio.Future):
+        if done.cancelled():
+            for waiter in waiters:
+                waiter.cancel()
+            self._done(gap, [])
+        elif done.exception() is not None:
+            self._done(gap, waiters, error=done.exception())
+        else:
+            self._done(gap, waiters, ranks=done.result())
+
+    def _done(
+            self,
+            gap: _Gap,
+            waiters: List[asyncio.Future],
+            ranks: Optional[List[LexoRank]] = None,
+            error: Optional[BaseException] = None
+    ):
+        if ranks:
+            gap.low = ranks[-1]
+        for index, waiter in enumerate(waiters):
+            # A caller may have been cancelled while its batch was computed
+            if waiter.done():
+                continue
+            if error is not None:
+                waiter.set_exception(error)
+            else:
+                waiter.set_result(ranks[index])
+        # Requests that came in while the batch was computed form the next batch
+        if gap.waiters:
+            self._schedule(asyncio.get_running_loop(), gap)
+        else:
+            gap.busy = False
+
+    def _evict(self):
+        while len(self._gaps) > self.max_gaps:
+            for key, gap in self._gaps.items():
+                if not gap.busy:
+                    del self._gaps[key]
+                    self._evicted[key] = gap.low
+                    break
+            else:
+                return
+
+    # The batches are plain functions of picklable ranks, so a process pool works as executor
+    @staticmethod
+    def _between_batch(
+            low: LexoRank, high: LexoRank, max_length: Optional[int], n: int
+    ) -> List[LexoRank]:
+        if n == 1 and max_length is None:
+            return [low.between(high)]
+        return low.between_many(high, n, max_length=max_length)
+
+    @staticmethod
+    def _next_batch(
+            rank: LexoRank, high: Optional[LexoRank], max_length: Optional[int], n: int
+    ) -> List[LexoRank]:
+        ranks = []
+        for _ in range(n):
+            rank = rank.gen_next()
+            ranks.append(rank)
+        return ranks
@@ -0,0 +1,54 @@
+"""
+File:           lexo_rank_sort.py
+Created on:     18/10/26, 8:20 pm
+"""
+import heapq
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from src.lexo_rank import LexoRank
+
+T = TypeVar("T")
+
+
+class LexoRankSort:
+    """
+    Bulk sorting and merging of ranks through LexoRank.sort_key, so the comparisons are
+    plain string comparisons. The order is the compare_to order: by bucket, then by
+    decimal. For the logical order of a list that is moving between buckets use
+    LexoRankMigration.key instead.
+    """
+
+    @staticmethod
+    def sort(ranks: Iterable[LexoRank], reverse: bool = False) -> List[LexoRank]:
+        return sorted(ranks, key=LexoRank.sort_key, reverse=reverse)
+
+    @staticmethod
+    def sort_in_place(ranks: List[LexoRank], reverse: bool = False):
+        ranks.sort(key=LexoRank.sort_key, reverse=reverse)
+
+    @staticmethod
+    def sort_by_rank(
+            items: Iterable[T], rank_of: Callable[[T], LexoRank], reverse: bool = False
+    ) -> List[T]:
+        """ Sort items that carry a rank, e.g. rows or cards """
+        return sorted(items, key=lambda item: rank_of(item).value, reverse=reverse)
+
+    @staticmethod
+    def merge(
+            *streams: Iterable[LexoRank], key: Optional[Callable[[LexoRank], str]] = None
+    ) -> Iterator[LexoRank]:
+        """
+        Lazily merge sorted rank streams, e.g. one per shard or per bucket. Only the head
+        of every stream is held in memory.
+        """
+        return heapq.merge(*streams, key=key if key is not None else LexoRank.sort_key)
+
+    @staticmethod
+    def merge_strings(*streams: Iterable[str]) -> Iterator[str]:
+        """ Lazily merge sorted streams of canonical rank strings, with no parsing at all """
+        return heapq.merge(*streams)
+
+    @staticmethod
+    def merge_by_rank(*streams: Iterable[T], rank_of: Callable[[T], LexoRank]) -> Iterator[T]:
+        """ Lazily merge sorted streams of items that carry a rank """
+        return heapq.merge(*streams, key=lambda item: rank_of(item).value)
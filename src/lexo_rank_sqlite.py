@@ -0,0 +1,113 @@
+"""
+File:           lexo_rank_sqlite.py
+Created on:     18/10/26, 8:20 pm
+
+SQLite functions and collation for ranks, so rank work can be done set wise inside a query:
+
+    register(connection)
+    -- rank for an item between every row and the next one
+    SELECT id, lexo_between(rank, LEAD(rank) OVER (ORDER BY rank COLLATE LEXORANK))
+    FROM cards
+    -- rows whose rank grew too long
+    SELECT id FROM cards WHERE lexo_len(rank) > 64
+
+lexo_between(a, b) takes NULL for a missing neighbour, like inserting at the head or the
+tail of a list.
+"""
+import sqlite3
+from typing import Optional
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+
+COLLATION = "LEXORANK"
+
+
+class LexoRankSqlite:
+    """ Register the rank helpers on a connection and re-rank tables """
+
+    @staticmethod
+    def register(connection: sqlite3.Connection, system: Optional[LexoNumeralSystem] = None):
+        """ Add lexo_between, lexo_next, lexo_prev, lexo_len and the LEXORANK collation """
+        if system is None:
+            system = LexoRank.NUMERAL_SYSTEM
+
+        def parse(value: str) -> LexoRank:
+            return LexoRank.parse(value, system=system)
+
+        def lexo_between(a: Optional[str], b: Optional[str]) -> str:
+            if a is None and b is None:
+                return LexoRank.middle(system).value
+            if a is None:
+                return parse(b).gen_prev().value
+            if b is None:
+                return parse(a).gen_next().value
+            return parse(a).between(parse(b)).value
+
+        def lexo_next(a: Optional[str]) -> Optional[str]:
+            return None if a is None else parse(a).gen_next().value
+
+        def lexo_prev(a: Optional[str]) -> Optional[str]:
+            return None if a is None else parse(a).gen_prev().value
+
+        def lexo_len(a: Optional[str]) -> Optional[int]:
+            return None if a is None else len(a)
+
+        def collate(a: str, b: str) -> int:
+            # Canonical ranks compare like strings, parsing only matters for the others
+            return LexoRank.parse(a, lazy=True, system=system).compare_to(
+                LexoRank.parse(b, lazy=True, system=system)
+            )
+
+        connection.create_function("lexo_between", 2, lexo_between, deterministic=True)
+        connection.create_function("lexo_next", 1, lexo_next, deterministic=True)
+        connection.create_function("lexo_prev", 1, lexo_prev, deterministic=True)
+        connection.create_function("lexo_len", 1, lexo_len, deterministic=True)
+        connection.create_collation(COLLATION, collate)
+
+    @staticmethod
+    def rerank(
+            connection: sqlite3.Connection,
+            table: str,
+            column: str = "rank",
+            key: str = "rowid",
+            bucket: Optional[LexoRankBucket] = None,
+            batch_size: int = 1000,
+            system: Optional[LexoNumeralSystem] = None
+    ) -> int:
+        """
+        Rewrite the rank column of every row with evenly spaced ranks in the current order,
+        in one transaction, and return the number of rows. Rows are streamed through a
+        cursor and updated with executemany in batches. The new ranks go to bucket, or to
+        the bucket of the first row when bucket is None. register must have been called.
+        """
+        for name in (table, column, key):
+            if not name.isidentifier():
+                raise ValueError(f"Not a valid identifier {name}")
+        connection.execute("SAVEPOINT lexo_rerank")
+        try:
+            count = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            # Ordering through the collation can not use an index on the column, so SQLite
+            # sorts every row before the first one is returned and the updates can not
+            # disturb the cursor
+            cursor = connection.execute(
+                f"SELECT {key}, {column} FROM {table} ORDER BY {column} COLLATE {COLLATION}"
+            )
+            ranks = None
+            update = f"UPDATE {table} SET {column} = ? WHERE {key} = ?"
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if ranks is None:
+                    if bucket is None:
+                        bucket = LexoRankBucket.make_from(rows[0][1].partition("|")[0])
+                    ranks = LexoRank.initial_sequence(count, bucket, system)
+                connection.executemany(update, ((next(ranks).value, row[0]) for row in rows))
+        except BaseException:
+            connection.execute("ROLLBACK TO lexo_rerank")
+            connection.execute("RELEASE lexo_rerank")
+            raise
+        connection.execute("RELEASE lexo_rerank")
+        return count
@@ -0,0 +1,193 @@
+"""
+File:           lexo_rank_string.py
+Created on:     18/10/26, 8:08 pm
+
+Rank arithmetic directly on rank strings. Decimals are handled as (value, scale) pairs of
+python ints, so no LexoInteger / LexoDecimal / LexoRank objects are built. The results
+match LexoRank.between, LexoRank.gen_next and LexoRank.gen_prev exactly.
+"""
+from typing import Tuple
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+
+_SYSTEM = LexoRank.NUMERAL_SYSTEM
+_BASE = _SYSTEM.get_base
+_RADIX = _SYSTEM.radix_point_char
+_ZERO = _SYSTEM.to_char(0)
+_INTEGER_DIGITS = LexoRank.INTEGER_DIGITS
+_MIN = (0, 0)
+_MAX = (_BASE ** _INTEGER_DIGITS - 1, 0)
+_EIGHT = (8, 0)
+_HALF = (_BASE // 2, 1)
+_INITIAL_MIN = (_BASE ** (_INTEGER_DIGITS - 1), 0)
+_INITIAL_MAX = ((_BASE - 2) * _BASE ** (_INTEGER_DIGITS - 1), 0)
+
+Decimal = Tuple[int, int]
+
+
+def rank_between(a: str, b: str) -> str:
+    """ Rank string between two rank strings of the same bucket """
+    bucket, left = _split(a)
+    other_bucket, right = _split(b)
+    if bucket != other_bucket:
+        raise ValueError("between works on same bucket")
+    cmp = _compare(left, right)
+    if cmp == 0:
+        raise ValueError("Try to rank between different ranks")
+    if cmp > 0:
+        left, right = right, left
+    return _join(bucket, _between(left, right))
+
+
+def rank_next(rank: str) -> str:
+    """ Rank string after a rank string, same as LexoRank.gen_next """
+    bucket, decimal = _split(rank)
+    if decimal == _MIN:
+        return _join(bucket, _INITIAL_MIN)
+    value, scale = decimal
+    ceil = value if scale == 0 else value // _BASE ** scale + 1
+    next_decimal = _add((ceil, 0), _EIGHT)
+    if _compare(next_decimal, _MAX) >= 0:
+        next_decimal = _between(decimal, _MAX)
+    return _join(bucket, next_decimal)
+
+
+def rank_prev(rank: str) -> str:
+    """ Rank string before a rank string, same as LexoRank.gen_prev """
+    bucket, decimal = _split(rank)
+    if decimal == _MAX:
+        return _join(bucket, _INITIAL_MAX)
+    value, scale = decimal
+    prev_decimal = _sub((value // _BASE ** scale, 0), _EIGHT)
+    if _compare(prev_decimal, _MIN) <= 0:
+        prev_decimal = _between(_MIN, decimal)
+    return _join(bucket, prev_decimal)
+
+
+def _split(rank: str) -> Tuple[str, Decimal]:
+    """ Split a rank string into its bucket and normalised decimal """
+    bucket, _, string = rank.partition("|")
+    LexoRankBucket.make_from(bucket)
+    if string.count(_RADIX) > 1:
+        raise ValueError(f"More than one {_RADIX}")
+    integer, _, fraction = string.partition(_RADIX)
+    fraction = fraction.rstrip(_ZERO)
+    return bucket, (_SYSTEM.parse_int(integer + fraction), len(fraction))
+
+
+def _join(bucket: str, decimal: Decimal) -> str:
+    """ Format a bucket and decimal the way LexoRank._format_decimal does """
+    value, scale = decimal
+    digits = _SYSTEM.format_int(value)
+    if scale:
+        digits = digits.rjust(scale + 1, _ZERO)
+        integer, fraction = digits[:-scale], digits[-scale:]
+    else:
+        integer, fraction = digits, ""
+    return bucket + "|" + integer.rjust(_INTEGER_DIGITS, _ZERO) + _RADIX + fraction
+
+
+def _make(value: int, scale: int) -> Decimal:
+    """ Strip the zero digits at the end of the fraction """
+    if not value:
+        return _MIN
+    while scale > 0 and value % _BASE == 0:
+        value //= _BASE
+        scale -= 1
+    return value, scale
+
+
+def _align(left: Decimal, right: Decimal) -> Tuple[int, int, int]:
+    if left[1] < right[1]:
+        return left[0] * _BASE ** (right[1] - left[1]), right[0], right[1]
+    if right[1] < left[1]:
+        return left[0], right[0] * _BASE ** (left[1] - right[1]), left[1]
+    return left[0], right[0], left[1]
+
+
+def _add(left: Decimal, right: Decimal) -> Decimal:
+    left_value, right_value, scale = _align(left, right)
+    return _make(left_value + right_value, scale)
+
+
+def _sub(left: Decimal, right: Decimal) -> Decimal:
+    left_value, right_value, scale = _align(left, right)
+    return _make(left_value - right_value, scale)
+
+
+def _compare(left: Decimal, right: Decimal) -> int:
+    left_value, right_value, _ = _align(left, right)
+    return -1 if left_value < right_value else 1 if left_value > right_value else 0
+
+
+def _set_scale(decimal: Decimal, scale: int, ceiling: bool = False) -> Decimal:
+    value, old_scale = decimal
+    if scale >= old_scale:
+        return decimal
+    scale = max(scale, 0)
+    value //= _BASE ** (old_scale - scale)
+    if ceiling:
+        value += 1
+    return _make(value, scale)
+
+
+def _mid(left: Decimal, right: Decimal) -> Decimal:
+    total = _add(left, right)
+    mid = _make(total[0] * _HALF[0], total[1] + _HALF[1])
+    scale = max(left[1], right[1])
+    if mid[1] > scale:
+        round_down = _set_scale(mid, scale, ceiling=False)
+        if _compare(round_down, left) > 0:
+            return round_down
+        round_up = _set_scale(mid, scale, ceiling=True)
+        if _compare(round_up, right) < 0:
+            return round_up
+    return mid
+
+
+def _check_mid(left_bound: Decimal, right_bound: Decimal, mid: Decimal) -> Decimal:
+    if _compare(left_bound, mid) >= 0 or _compare(mid, right_bound) >= 0:
+        return _mid(left_bound, right_bound)
+    return mid
+
+
+def _between(old_left: Decimal, old_right: Decimal) -> Decimal:
+    """ Same steps as LexoRank.between_decimal """
+    left = old_left
+    right = old_right
+    if old_left[1] < old_right[1]:
+        new_left = _set_scale(old_right, old_left[1], ceiling=False)
+        if _compare(old_left, new_left) >= 0:
+            return _mid(old_left, old_right)
+        right = new_left
+
+    if old_left[1] > right[1]:
+        new_left = _set_scale(old_left, right[1], ceiling=True)
+        if _compare(new_left, right) >= 0:
+            return _mid(old_left, old_right)
+        left = new_left
+    scale = left[1]
+    while scale > 0:
+        new_scale = scale - 1
+        new_left = _set_scale(left, new_scale, ceiling=True)
+        new_right = _set_scale(right, new_scale, ceiling=False)
+        cmp = _compare(new_left, new_right)
+        if cmp == 0:
+            return _check_mid(old_left, old_right, new_left)
+        if cmp > 0:
+            break
+        scale = new_scale
+        left = new_left
+        right = new_right
+
+    mid = _check_mid(old_left, old_right, _mid(left, right))
+    mid_scale = mid[1]
+    while mid_scale > 0:
+        new_scale = mid_scale - 1
+        new_mid = _set_scale(mid, new_scale, ceiling=False)
+        if _compare(old_left, new_mid) >= 0 or _compare(new_mid, old_right) >= 0:
+            break
+        mid = new_mid
+        mid_scale = new_scale
+    return mid
@@ -0,0 +1,174 @@
+"""
+File:           lexo_ranked_list.py
+Created on:     18/10/26, 8:14 pm
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank, RebalanceNeededError
+from src.lexo_rank_bucket import LexoRankBucket
+
+RankChange = Tuple[Hashable, LexoRank, LexoRank]
+
+
+class RankedList:
+    """
+    Items kept in rank order. Every insert or move computes the rank of the item from its
+    new neighbours, and the position of an item is found by bisecting the sorted rank
+    strings. When a new rank would be longer than max_length, the neighbourhood of the
+    insert is re-spaced and the changed ranks are reported through on_respace.
+    """
+
+    def __init__(
+            self,
+            ranked_items: Optional[Iterable[Tuple[Hashable, LexoRank]]] = None,
+            max_length: int = 64,
+            bucket: Optional[LexoRankBucket] = None,
+            system: Optional[LexoNumeralSystem] = None,
+            on_respace: Optional[Callable[[List[RankChange]], None]] = None
+    ):
+        self.max_length = max_length
+        self.bucket = bucket if bucket is not None else LexoRankBucket.get_bucket_0()
+        self.system = system if system is not None else LexoRank.NUMERAL_SYSTEM
+        self.on_respace = on_respace
+        ordered = sorted(ranked_items or [], key=lambda ranked_item: ranked_item[1].value)
+        self._items: List[Hashable] = [item for item, _ in ordered]
+        self._keys: List[str] = [rank.value for _, rank in ordered]
+        self._rank_of: Dict[Hashable, LexoRank] = dict(ordered)
+        if len(self._rank_of) != len(self._items):
+            raise ValueError("Items of a RankedList should be unique")
+        for prev, key in zip(self._keys, self._keys[1:]):
+            if prev == key:
+                raise ValueError(f"Duplicate rank {key}")
+
+    @staticmethod
+    def from_items(items: Iterable[Hashable], **kwargs) -> "RankedList":
+        """ Rank the items in their current order with evenly spaced ranks """
+        items = list(items)
+        bucket = kwargs.get("bucket")
+        system = kwargs.get("system")
+        ranks = LexoRank.initial_sequence(len(items), bucket, system)
+        return RankedList(zip(items, ranks), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._items)
+
+    def __getitem__(self, index: int) -> Hashable:
+        return self._items[index]
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._rank_of
+
+    def rank_of(self, item: Hashable) -> LexoRank:
+        return self._rank_of[item]
+
+    def index(self, item: Hashable) -> int:
+        """ Position of an item, found by bisecting the ranks """
+        return bisect_left(self._keys, self._rank_of[item].value)
+
+    def items(self) -> Iterator[Tuple[Hashable, LexoRank]]:
+        for item in self._items:
+            yield item, self._rank_of[item]
+
+    def insert_at(self, index: int, item: Hashable) -> LexoRank:
+        """ Insert an item so that it ends up at index and return its rank """
+        if item in self._rank_of:
+            raise ValueError(f"{item!r} is already in the list")
+        index = max(0, min(index, len(self._items)))
+        rank = self._rank_at(index)
+        if len(rank.value) > self.max_length:
+            return self._respace(index, item)
+        self._put(index, item, rank)
+        return rank
+
+    def append(self, item: Hashable) -> LexoRank:
+        return self.insert_at(len(self._items), item)
+
+    def insert_before(self, item: Hashable, anchor: Hashable) -> LexoRank:
+        return self.insert_at(self.index(anchor), item)
+
+    def insert_after(self, item: Hashable, anchor: Hashable) -> LexoRank:
+        return self.insert_at(self.index(anchor) + 1, item)
+
+    def move(self, item: Hashable, new_index: int) -> LexoRank:
+        """
+        Move an item so that it ends up at new_index and return its new rank. When no rank
+        fits within max_length the error is raised and the item stays where it was.
+        """
+        index = self.index(item)
+        rank = self.remove(item)
+        try:
+            return self.insert_at(new_index, item)
+        except ValueError:
+            # RebalanceNeededError is raised before the list is changed
+            if item not in self._rank_of:
+                self._put(index, item, rank)
+            raise
+
+    def remove(self, item: Hashable) -> LexoRank:
+        index = self.index(item)
+        del self._items[index]
+        del self._keys[index]
+        return self._rank_of.pop(item)
+
+    def _put(self, index: int, item: Hashable, rank: LexoRank):
+        self._items.insert(index, item)
+        self._keys.insert(index, rank.value)
+        self._rank_of[item] = rank
+
+    def _rank_at(self, index: int) -> LexoRank:
+        """ Rank for a new item at index, computed from its neighbours """
+        left = self._rank_of[self._items[index - 1]] if index > 0 else None
+        right = self._rank_of[self._items[index]] if index < len(self._items) else None
+        if left is not None and right is not None:
+            return left.between(right)
+        if left is not None:
+            return left.gen_next()
+        if right is not None:
+            return right.gen_prev()
+        return LexoRank.min(self.bucket, self.system).between(
+            LexoRank.max(self.bucket, self.system)
+        )
+
+    def _respace(self, index: int, item: Hashable) -> LexoRank:
+        """
+        Re-space a window around index, doubling it until the new item and the items of the
+        window fit between the window neighbours within max_length.
+        """
+        size = len(self._items)
+        radius = 1
+        while True:
+            low = max(0, index - radius)
+            high = min(size, index + radius)
+            left = self._rank_of[self._items[low - 1]] if low > 0 \
+                else LexoRank.min(self.bucket, self.system)
+            right = self._rank_of[self._items[high]] if high < size \
+                else LexoRank.max(self.bucket, self.system)
+            try:
+                ranks = left.between_many(right, high - low + 1, max_length=self.max_length)
+                break
+            except RebalanceNeededError:
+                if low == 0 and high == size:
+                    raise
+                radius *= 2
+        changes = []
+        for position, rank in enumerate(ranks, low):
+            if position == index:
+                continue
+            # Position in the list before the new item is put in
+            current = position if position < index else position - 1
+            window_item = self._items[current]
+            old_rank = self._rank_of[window_item]
+            if old_rank == rank:
+                continue
+            changes.append((window_item, old_rank, rank))
+            self._keys[current] = rank.value
+            self._rank_of[window_item] = rank
+        self._put(index, item, ranks[index - low])
+        if changes and self.on_respace is not None:
+            self.on_respace(changes)
+        return ranks[index - low]
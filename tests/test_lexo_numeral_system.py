@@ -0,0 +1,79 @@
+"""
+File:           test_lexo_numeral_system.py
+Created on:     18/10/26, 8:53 pm
+"""
+import random
+from fractions import Fraction
+
+import pytest
+
+from src.lexo_numeral_system import (
+    LexoNumeralSystem, LexoNumeralSystem36, LexoNumeralSystem62, LexoNumeralSystem90
+)
+from src.lexo_rank import LexoRank
+
+
+def test_to_digit_works_on_the_class_like_the_original_static_method():
+    assert LexoNumeralSystem.to_digit("0") == 0
+    assert LexoNumeralSystem.to_digit("a") == 10
+    assert LexoNumeralSystem.to_digit("z") == 35
+    with pytest.raises(ValueError):
+        LexoNumeralSystem.to_digit("A")
+
+
+@pytest.mark.parametrize(
+    "system_class", [LexoNumeralSystem36, LexoNumeralSystem62, LexoNumeralSystem90]
+)
+def test_to_digit_matches_to_char(system_class):
+    system = system_class()
+    for digit in range(system.get_base):
+        ch = system.to_char(digit)
+        assert system.to_digit(ch) == digit
+        assert system_class.to_digit(ch) == digit
+
+
+def value(rank: LexoRank) -> Fraction:
+    """ Exact value of the decimal of a rank, read digit by digit from its string """
+    system = rank.system
+    integer, _, fraction = rank.value.split("|")[1].partition(system.radix_point_char)
+    digits = integer + fraction
+    total = sum(
+        system.to_digit(ch) * system.get_base ** (len(digits) - 1 - index)
+        for index, ch in enumerate(digits)
+    )
+    return Fraction(total, system.get_base ** len(fraction))
+
+
+@pytest.mark.parametrize("system_class, expected", [
+    (LexoNumeralSystem62, ["0|000000:", "0|zzzzzz:", "0|Uzzzzz:", "0|100000:", "0|y00000:"]),
+    (LexoNumeralSystem90, ["0|!!!!!!:", "0|~~~~~~:", "0|P~~~~~:", '0|"!!!!!:', "0|}!!!!!:"]),
+])
+def test_edge_ranks(system_class, expected):
+    system = system_class()
+    low, high = LexoRank.min(system=system), LexoRank.max(system=system)
+    ranks = [low, high, LexoRank.middle(system=system), low.gen_next(), high.gen_prev()]
+    assert [rank.value for rank in ranks] == expected
+
+
+@pytest.mark.parametrize("system_class", [LexoNumeralSystem62, LexoNumeralSystem90])
+def test_rank_arithmetic(system_class):
+    system = system_class()
+    rng = random.Random(system.get_base)
+    left, right = LexoRank.min(system=system), LexoRank.max(system=system)
+    for _ in range(100):
+        middle = left.between(right)
+        assert value(left) < value(middle) < value(right)
+        assert left.value < middle.value < right.value
+        assert left.compare_to(middle) == -1 and middle.compare_to(right) == -1
+        assert LexoRank.parse(middle.value, system=system) == middle
+        assert LexoRank.is_canonical(middle.value, system)
+        if rng.random() < 0.5:
+            left = middle
+        else:
+            right = middle
+    middle = LexoRank.middle(system=system)
+    assert value(middle.gen_next()) - value(middle) == 8
+    assert value(middle) - value(middle.gen_prev()) == 8
+    ranks = left.between_many(right, 50)
+    assert [rank.value for rank in ranks] == sorted({rank.value for rank in ranks})
+    assert value(left) < value(ranks[0]) and value(ranks[-1]) < value(right)
@@ -0,0 +1,39 @@
+"""
+File:           test_lexo_rank_allocator.py
+Created on:     18/10/26, 8:32 pm
+"""
+import threading
+
+import pytest
+
+from src.lexo_rank_allocator import LexoRankAllocator
+from src.lexo_rank_block_store import (
+    InMemoryRankBlockStore, RankBlockStore, SqliteRankBlockStore
+)
+
+
+def test_store_without_reserve_fails_on_creation():
+    class IncompleteStore(RankBlockStore):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
+
+
+@pytest.mark.parametrize("store_type", ["memory", "sqlite"])
+def test_threads_get_distinct_increasing_ranks(store_type, tmp_path):
+    store = InMemoryRankBlockStore() if store_type == "memory" \
+        else SqliteRankBlockStore(str(tmp_path / "blocks.db"))
+    minted = {}
+    with LexoRankAllocator(store, "list", block_size=20, refill_at=5) as allocator:
+        def work(worker):
+            minted[worker] = [allocator.next_rank().value for _ in range(77)]
+
+        threads = [threading.Thread(target=work, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    ranks = [rank for worker_ranks in minted.values() for rank in worker_ranks]
+    assert len(set(ranks)) == len(ranks) == 4 * 77
+    assert all(worker_ranks == sorted(worker_ranks) for worker_ranks in minted.values())
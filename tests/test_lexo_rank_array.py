@@ -0,0 +1,98 @@
+"""
+File:           test_lexo_rank_array.py
+Created on:     18/10/26, 8:50 pm
+"""
+import bisect
+
+import pytest
+
+from src.lexo_numeral_system import LexoNumeralSystem62
+from src.lexo_rank import LexoRank
+from src.lexo_rank_array import RankArray
+
+
+def ranks(n):
+    return [rank.value for rank in LexoRank.initial_sequence(n)]
+
+
+@pytest.mark.parametrize("bad", ["garbage", "0|00000:1", "0|hzzzzz:0", "0|zzzzzz:1", ""])
+def test_append_rejects_non_canonical_strings(bad):
+    rank_array = RankArray()
+    rank_array.extend(ranks(3))
+    with pytest.raises(ValueError):
+        rank_array.append(bad)
+    assert len(rank_array) == 3
+    assert [rank.value for rank in rank_array] == ranks(3)
+
+
+def test_append_rejects_ranks_of_another_system():
+    rank_array = RankArray()
+    with pytest.raises(ValueError):
+        rank_array.append(LexoRank.middle(system=LexoNumeralSystem62()))
+    assert not len(rank_array)
+
+
+def long_ranks(n):
+    """ Sorted ranks of different lengths """
+    left, right = LexoRank.middle(), LexoRank.middle().gen_next()
+    for _ in range(30):
+        left, right = left.between(right), right
+    return [rank.value for rank in sorted(
+        [*LexoRank.initial_sequence(n), *left.between_many(right, n)], key=LexoRank.sort_key
+    )]
+
+
+def test_bisect_matches_bisect_on_strings():
+    values = long_ranks(50)
+    rank_array = RankArray()
+    rank_array.extend(values)
+    probes = values[::3] + [LexoRank.parse(value).gen_next().value for value in values[::7]]
+    probes += [LexoRank.min().value, LexoRank.max().value]
+    for probe in probes:
+        assert rank_array.bisect_left(probe) == bisect.bisect_left(values, probe)
+        assert rank_array.bisect_right(probe) == bisect.bisect_right(values, probe)
+        assert rank_array.bisect_left(LexoRank.parse(probe)) == bisect.bisect_left(values, probe)
+        assert (probe in rank_array) == (probe in values)
+    assert rank_array.index(values[17]) == 17
+    with pytest.raises(ValueError):
+        rank_array.index(LexoRank.max().value)
+
+
+def test_append_keeps_the_array_sorted():
+    rank_array = RankArray()
+    rank_array.extend(ranks(3))
+    with pytest.raises(ValueError):
+        rank_array.append(ranks(3)[0])
+    assert len(rank_array) == 3
+
+
+def test_save_and_load(tmp_path):
+    values = long_ranks(40)
+    rank_array = RankArray()
+    rank_array.extend(values)
+    path = str(tmp_path / "ranks.lxra")
+    rank_array.save(path)
+    with RankArray.load(path) as loaded:
+        assert len(loaded) == len(values)
+        assert [rank.value for rank in loaded] == values
+        assert loaded[5].value == values[5]
+        assert [rank.value for rank in loaded[10:20]] == values[10:20]
+        assert loaded.bisect_left(values[33]) == 33
+        with pytest.raises(ValueError):
+            loaded.append(LexoRank.max().value)
+    # A slice of a loaded array is a copy that outlives the memory map
+    with RankArray.load(path) as loaded:
+        part = loaded[:5]
+    assert [rank.value for rank in part] == values[:5]
+
+
+def test_load_checks_the_file(tmp_path):
+    path = tmp_path / "not_ranks"
+    path.write_bytes(b"XXXX" + bytes(12))
+    with pytest.raises(ValueError):
+        RankArray.load(str(path))
+    rank_array = RankArray()
+    rank_array.extend(ranks(3))
+    rank_array.save(str(tmp_path / "ranks.lxra"))
+    with pytest.raises(ValueError):
+        RankArray.load(str(tmp_path / "ranks.lxra"), LexoNumeralSystem62())
@@ -0,0 +1,38 @@
+"""
+File:           test_lexo_rank_bulk_rebalancer.py
+Created on:     18/10/26, 8:33 pm
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bulk_rebalancer import LexoRankBulkRebalancer
+
+
+def ranks(n):
+    return [rank.value for rank in LexoRank.initial_sequence(n)]
+
+
+def test_lists_are_rebalanced_in_a_process_pool():
+    lists = [(index, ranks(index)) for index in range(6)]
+    results = {
+        list_id: (pairs, error)
+        for list_id, pairs, error in LexoRankBulkRebalancer(processes=2).rebalance(lists)
+    }
+    assert sorted(results) == list(range(6))
+    for list_id, (pairs, error) in results.items():
+        assert error is None
+        assert [old for old, _ in pairs] == ranks(list_id)
+        new = [new for _, new in pairs]
+        assert new == sorted(new)
+        assert all(rank.startswith("1|") for rank in new)
+
+
+def test_a_failing_list_does_not_stop_the_others():
+    lists = [("good", ranks(3)), ("unsorted", list(reversed(ranks(3)))), ("other", ranks(4))]
+    with ThreadPoolExecutor(2) as executor:
+        rebalancer = LexoRankBulkRebalancer(max_in_flight=1, executor=executor)
+        results = {list_id: (pairs, error) for list_id, pairs, error in rebalancer.rebalance(lists)}
+    assert isinstance(results["unsorted"][1], ValueError)
+    assert results["unsorted"][0] == []
+    assert results["good"][1] is None and len(results["good"][0]) == 3
+    assert results["other"][1] is None and len(results["other"][0]) == 4
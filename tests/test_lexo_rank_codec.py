@@ -0,0 +1,64 @@
+"""
+File:           test_lexo_rank_codec.py
+Created on:     18/10/26, 8:50 pm
+"""
+import random
+from functools import cmp_to_key
+
+import pytest
+
+from src.lexo_numeral_system import LexoNumeralSystem36, LexoNumeralSystem62, LexoNumeralSystem90
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+from src.lexo_rank_codec import LexoRankCodec
+
+SYSTEM = LexoRank.NUMERAL_SYSTEM
+
+
+@pytest.mark.parametrize("rank", ["0|000000:", "0|hzzzzz:", "1|i0000g:00x", "2|zzzzzz:"])
+def test_encode_decode_round_trip(rank):
+    assert LexoRankCodec.decode(LexoRankCodec.encode(rank, SYSTEM), SYSTEM) == rank
+
+
+@pytest.mark.parametrize(
+    "rank",
+    ["", "0|00000:1", "0|0000000:", "0|hzzzzz", "0|hzzzzz:10", "3|hzzzzz:", "0|zzzzzz:1",
+     "0hzzzzz:", "0|HZZZZZ:", "garbage"]
+)
+def test_encode_rejects_non_canonical_ranks(rank):
+    with pytest.raises(ValueError):
+        LexoRankCodec.encode(rank, SYSTEM)
+
+
+def ranks_of(system, n=300):
+    """ Ranks of every bucket and many lengths, from a random walk of between calls """
+    rng = random.Random(system.get_base)
+    ranks = set()
+    for bucket in LexoRankBucket.get_values():
+        left, right = LexoRank.min(bucket, system), LexoRank.max(bucket, system)
+        ranks.update((left, right))
+        for _ in range(n // 3):
+            middle = left.between(right)
+            ranks.add(middle)
+            if rng.random() < 0.5:
+                left = middle
+            else:
+                right = middle
+    return list(ranks)
+
+
+@pytest.mark.parametrize(
+    "system_class", [LexoNumeralSystem36, LexoNumeralSystem62, LexoNumeralSystem90]
+)
+def test_bytes_sort_in_rank_order(system_class):
+    system = system_class()
+    ranks = ranks_of(system)
+    random.Random(1).shuffle(ranks)
+    by_rank = sorted(ranks, key=cmp_to_key(LexoRank.compare_to))
+    by_bytes = sorted(ranks, key=lambda rank: LexoRankCodec.encode(rank.value, system))
+    assert by_bytes == by_rank
+    for rank in ranks:
+        data = LexoRankCodec.encode(rank.value, system)
+        assert LexoRankCodec.decode(data, system) == rank.value
+        assert rank.to_bytes() == data
+        assert LexoRank.from_bytes(data, system) == rank
@@ -0,0 +1,92 @@
+"""
+File:           test_lexo_rank_migration.py
+Created on:     18/10/26, 8:30 pm
+"""
+from itertools import islice
+
+import pytest
+
+from src.lexo_rank import LexoRank, RebalanceNeededError
+from src.lexo_rank_bucket import LexoRankBucket
+from src.lexo_rank_migration import LexoRankMigration
+from src.lexo_rank_rebalancer import LexoRankRebalancer
+
+
+def partial_migration(size, migrated, headroom=0):
+    """ Items with their source ranks, and a rebalancer that moved the first ones """
+    source = [rank.value for rank in LexoRank.initial_sequence(size, LexoRankBucket.get_bucket_0())]
+    items = {rank: f"item{index}" for index, rank in enumerate(source)}
+    rebalancer = LexoRankRebalancer(LexoRankBucket.get_bucket_0(), size + headroom)
+    stream = rebalancer.rebalance(iter(source))
+    moved = dict(islice(stream, migrated))
+    ranks = {items[old]: LexoRank.parse(new) for old, new in moved.items()}
+    for old in source[migrated:]:
+        ranks[items[old]] = LexoRank.parse(old)
+    return rebalancer, stream, ranks
+
+
+def logical_order(migration, ranks):
+    target = sorted(rank for rank in ranks.values() if rank.bucket == migration.target)
+    source = sorted(rank for rank in ranks.values() if rank.bucket == migration.source)
+    by_rank = {rank.value: item for item, rank in ranks.items()}
+    return [by_rank[rank.value] for rank in migration.merged(source, target)]
+
+
+def test_merged_follows_a_partial_rebalance():
+    rebalancer, _, ranks = partial_migration(6, 3)
+    migration = LexoRankMigration(rebalancer)
+    assert logical_order(migration, ranks) == [f"item{index}" for index in range(6)]
+
+
+def test_new_items_keep_their_place_until_the_rebalance_ends():
+    rebalancer, stream, ranks = partial_migration(6, 3, headroom=2)
+    migration = LexoRankMigration(rebalancer, size=6)
+    ranks["frontier"] = migration.between(ranks["item2"], ranks["item3"])
+    ranks["source"] = migration.between(ranks["item4"], ranks["item5"])
+    ranks["head"] = migration.gen_prev(ranks["item0"])
+    ranks["tail"] = migration.gen_next(ranks["item5"])
+    assert ranks["frontier"].bucket == migration.target
+    assert ranks["head"].bucket == migration.target
+    expected = ["head", "item0", "item1", "item2", "frontier", "item3", "item4", "source",
+                "item5", "tail"]
+    assert logical_order(migration, ranks) == expected
+
+    # The rest of the rebalance sees the unmigrated ranks, including the new ones
+    by_old = {rank.value: item for item, rank in ranks.items()}
+    stream.close()
+    remaining = sorted(rank.value for rank in ranks.values() if rank.bucket == migration.source)
+    for old, new in rebalancer.rebalance(iter(remaining)):
+        ranks[by_old[old]] = LexoRank.parse(new)
+    assert all(rank.bucket == migration.target for rank in ranks.values())
+    assert sorted(ranks, key=lambda item: ranks[item].value) == expected
+
+
+def test_unmigrated_inserts_stop_when_the_headroom_is_used_up():
+    rebalancer, stream, ranks = partial_migration(6, 3)
+    migration = LexoRankMigration(rebalancer)
+    with pytest.raises(RebalanceNeededError):
+        migration.between(ranks["item4"], ranks["item5"])
+    # Target bucket inserts need no headroom
+    ranks["frontier"] = migration.between(ranks["item2"], ranks["item3"])
+    assert ranks["frontier"].bucket == migration.target
+    stream.close()
+    remaining = sorted(rank.value for rank in ranks.values() if rank.bucket == migration.source)
+    assert len(list(rebalancer.rebalance(iter(remaining)))) == 3
+
+
+def test_unmigrated_inserts_use_the_headroom():
+    rebalancer, _, ranks = partial_migration(6, 3, headroom=2)
+    migration = LexoRankMigration(rebalancer, size=6)
+    ranks["new0"] = migration.gen_next(ranks["item5"])
+    ranks["new1"] = migration.between(ranks["item4"], ranks["item5"])
+    assert migration.source_inserts == 2
+    with pytest.raises(RebalanceNeededError):
+        migration.gen_next(ranks["new0"])
+
+
+def test_frontier_before_anything_migrated():
+    rebalancer, _, ranks = partial_migration(4, 0)
+    migration = LexoRankMigration(rebalancer)
+    ranks["head"] = migration.gen_prev(ranks["item0"])
+    assert ranks["head"].bucket == migration.target
+    assert logical_order(migration, ranks) == ["head", "item0", "item1", "item2", "item3"]
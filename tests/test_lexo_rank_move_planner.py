@@ -0,0 +1,46 @@
+"""
+File:           test_lexo_rank_move_planner.py
+Created on:     18/10/26, 8:32 pm
+"""
+import pytest
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_move_planner import LexoRankMovePlanner
+
+A, B, C, D = LexoRank.initial_sequence(4)
+
+
+def test_moves_into_one_gap_are_spread_in_batch_order():
+    updates = LexoRankMovePlanner.plan([("x", A, B), ("y", A, B), ("z", A, B)])
+    assert [item for item, _ in updates] == ["x", "y", "z"]
+    ranks = [rank for _, rank in updates]
+    assert A < ranks[0] < ranks[1] < ranks[2] < B
+
+
+def test_last_move_of_an_item_wins():
+    updates = LexoRankMovePlanner.plan([("x", A, B), ("x", C, D)])
+    assert len(updates) == 1
+    assert C < updates[0][1] < D
+
+
+def test_gaps_sharing_a_bound_are_allowed():
+    updates = dict(LexoRankMovePlanner.plan([("x", A, B), ("y", B, C), ("z", None, A)]))
+    assert updates["z"] < A < updates["x"] < B < updates["y"] < C
+
+
+@pytest.mark.parametrize("gaps", [
+    [(A, C), (B, C)],
+    [(A, D), (B, C)],
+    [(A, C), (B, D)],
+    [(None, B), (A, C)],
+])
+def test_overlapping_gaps_are_rejected(gaps):
+    moves = [(f"item{index}", left, right) for index, (left, right) in enumerate(gaps)]
+    with pytest.raises(ValueError, match="overlaps"):
+        LexoRankMovePlanner.plan(moves)
+
+
+def test_items_already_in_place_are_not_updated():
+    middle = A.between(B)
+    updates = LexoRankMovePlanner.plan([("x", A, B), ("y", C, D)], current_ranks={"x": middle})
+    assert [item for item, _ in updates] == ["y"]
@@ -0,0 +1,126 @@
+"""
+File:           test_lexo_rank_numpy.py
+Created on:     18/10/26, 8:38 pm
+"""
+import random
+from bisect import bisect_left, bisect_right
+from functools import cmp_to_key
+
+import pytest
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+from src.lexo_rank_numpy import LexoRankNumpy
+
+np = pytest.importorskip("numpy")
+
+
+def corpus():
+    """ Sorted ranks of every bucket, short and long, with the min, max and middle ranks """
+    rng = random.Random(25)
+    ranks = {LexoRank.min().value, LexoRank.max().value, LexoRank.middle().value}
+    for bucket in LexoRankBucket.get_values():
+        ranks.update(rank.value for rank in LexoRank.initial_sequence(20, bucket))
+        left, right = LexoRank.min(bucket), LexoRank.max(bucket)
+        for _ in range(60):
+            middle = left.between(right)
+            ranks.add(middle.value)
+            if rng.random() < 0.5:
+                left = middle
+            else:
+                right = middle
+    parsed = sorted(map(LexoRank.parse, ranks), key=cmp_to_key(LexoRank.compare_to))
+    return [rank.value for rank in parsed]
+
+
+RANKS = corpus()
+INVALID = [
+    "", "0|", "0|hzzzzz", "0|hzzzzz:0", "3|hzzzzz:", "0|hzzzz:", "0|HZZZZZ:", "0hzzzzz:",
+    "0|zzzzzz:1",
+]
+
+
+def test_ranks_sort_bytewise_in_the_compare_to_order():
+    assert RANKS == sorted(RANKS)
+    assert LexoRankNumpy.argsort(RANKS).tolist() == list(range(len(RANKS)))
+    shuffled = list(RANKS)
+    random.Random(1).shuffle(shuffled)
+    order = LexoRankNumpy.argsort(shuffled)
+    assert [shuffled[index] for index in order] == RANKS
+    assert LexoRankNumpy.is_strictly_increasing(RANKS)
+    assert not LexoRankNumpy.is_strictly_increasing(shuffled)
+
+
+def test_is_valid_matches_is_canonical():
+    strings = RANKS + INVALID
+    expected = [LexoRank.is_canonical(string) for string in strings]
+    assert LexoRankNumpy.is_valid(strings).tolist() == expected
+
+
+def test_compare_matches_compare_to():
+    shuffled = list(RANKS)
+    random.Random(2).shuffle(shuffled)
+    expected = [
+        LexoRank.parse(a).compare_to(LexoRank.parse(b)) for a, b in zip(RANKS, shuffled)
+    ]
+    assert LexoRankNumpy.compare(RANKS, shuffled).tolist() == expected
+    assert not LexoRankNumpy.compare(RANKS, RANKS).any()
+
+
+@pytest.mark.parametrize("side, bisect", [("left", bisect_left), ("right", bisect_right)])
+def test_searchsorted_matches_bisect(side, bisect):
+    probes = RANKS[::7] + [LexoRank.parse(rank).gen_next().value for rank in RANKS[:50:5]]
+    expected = [bisect(RANKS, probe) for probe in probes]
+    assert LexoRankNumpy.searchsorted(RANKS, probes, side).tolist() == expected
+
+
+def test_digit_matrix_and_values_match_parse():
+    system = LexoRank.NUMERAL_SYSTEM
+    digits = LexoRankNumpy.digit_matrix(RANKS)
+    values = LexoRankNumpy.values(RANKS, fraction_digits=6)
+    for row, value, string in zip(digits, values, RANKS):
+        rank = LexoRank.parse(string)
+        bucket, _, decimal = string.partition("|")
+        expected = [system.to_digit(ch) + 1 for ch in bucket + decimal.replace(":", "")]
+        assert row[:len(expected)].tolist() == expected
+        assert not row[len(expected):].any()
+        truncated = rank.decimal.set_scale(6)
+        expected_value = truncated.mag.value / system.get_base ** truncated.sig
+        assert value == pytest.approx(expected_value, rel=1e-12)
+
+
+def test_length_stats_match_python():
+    lengths = [len(rank) for rank in RANKS]
+    stats = LexoRankNumpy.length_stats(RANKS)
+    assert stats["count"] == len(lengths)
+    assert stats["min"] == min(lengths)
+    assert stats["max"] == max(lengths)
+    assert stats["mean"] == pytest.approx(sum(lengths) / len(lengths))
+    assert stats["histogram"] == {length: lengths.count(length) for length in set(lengths)}
+    assert LexoRankNumpy.length_stats([]) == {"count": 0}
+
+
+def test_gap_stats_only_count_gaps_within_a_bucket():
+    stats = LexoRankNumpy.gap_stats(RANKS)
+    same_bucket = sum(a[0] == b[0] for a, b in zip(RANKS, RANKS[1:]))
+    assert stats["count"] == same_bucket
+    assert stats["min"] >= 0
+
+
+@pytest.mark.parametrize("integer", ["000001", "y00000", "zzzzzy"])
+def test_gap_stats_are_exact_at_any_integer_part(integer):
+    stats = LexoRankNumpy.gap_stats([f"0|{integer}:00001", f"0|{integer}:00002"])
+    assert stats["min"] == pytest.approx(36.0 ** -5)
+    assert stats["tight"] == 0
+    stats = LexoRankNumpy.gap_stats([f"0|{integer}:000001", f"0|{integer}:0000011"])
+    assert stats["tight"] == 1
+
+
+def test_gap_stats_tight_count_matches_python():
+    system = LexoRank.NUMERAL_SYSTEM
+    truncated = [LexoRank.parse(rank).decimal.set_scale(6) for rank in RANKS]
+    expected = sum(
+        a[0] == b[0] and left.compare_to(right) == 0
+        for a, b, left, right in zip(RANKS, RANKS[1:], truncated, truncated[1:])
+    )
+    assert LexoRankNumpy.gap_stats(RANKS, system)["tight"] == expected
@@ -0,0 +1,86 @@
+"""
+File:           test_lexo_rank_service.py
+Created on:     18/10/26, 8:31 pm
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_service import AsyncRankService
+
+
+def gap():
+    left = LexoRank.middle()
+    return left, left.gen_next()
+
+
+def test_requests_of_one_window_are_coalesced():
+    async def run():
+        service = AsyncRankService()
+        left, right = gap()
+        return left, right, await asyncio.gather(*(service.between(left, right) for _ in range(5)))
+
+    left, right, ranks = asyncio.run(run())
+    assert len({rank.value for rank in ranks}) == 5
+    assert ranks == sorted(ranks)
+    assert all(left < rank < right for rank in ranks)
+
+
+def test_two_windows_on_the_same_gap_get_distinct_ranks():
+    async def run():
+        service = AsyncRankService(window=0.001)
+        left, right = gap()
+        first = await asyncio.gather(*(service.between(left, right) for _ in range(3)))
+        second = await asyncio.gather(*(service.between(right, left) for _ in range(3)))
+        after = await asyncio.gather(*(service.next_after(left) for _ in range(2)))
+        after += await asyncio.gather(*(service.next_after(left) for _ in range(2)))
+        return left, right, first + second, after
+
+    left, right, ranks, after = asyncio.run(run())
+    assert len({rank.value for rank in ranks}) == 6
+    assert all(left < rank < right for rank in ranks)
+    assert len({rank.value for rank in after}) == 4
+
+
+def test_requests_during_an_executor_batch_get_distinct_ranks():
+    async def run():
+        with ThreadPoolExecutor(1) as executor:
+            service = AsyncRankService(window=0, executor=executor, executor_threshold=1)
+            left, right = gap()
+            first = [asyncio.ensure_future(service.between(left, right)) for _ in range(3)]
+            # Let the first batch start on the executor before the next requests come in
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            second = [asyncio.ensure_future(service.between(left, right)) for _ in range(3)]
+            return await asyncio.gather(*first, *second)
+
+    ranks = asyncio.run(run())
+    assert len({rank.value for rank in ranks}) == 6
+
+
+def test_an_evicted_gap_does_not_repeat_ranks():
+    async def run():
+        service = AsyncRankService(window=0, max_gaps=1)
+        left, right = gap()
+        first = await asyncio.gather(*(service.between(left, right) for _ in range(3)))
+        # Requests for other gaps evict the first one
+        await service.next_after(right)
+        await service.next_after(left)
+        assert len(service._gaps) == 1
+        second = await asyncio.gather(*(service.between(left, right) for _ in range(3)))
+        return first + second
+
+    ranks = asyncio.run(run())
+    assert len({rank.value for rank in ranks}) == 6
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    async def run():
+        service = AsyncRankService()
+        rank = LexoRank.middle()
+        return await asyncio.gather(
+            service.between(rank, rank), service.between(rank, rank), return_exceptions=True
+        )
+
+    errors = asyncio.run(run())
+    assert all(isinstance(error, ValueError) for error in errors)
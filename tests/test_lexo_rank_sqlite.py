@@ -0,0 +1,100 @@
+"""
+File:           test_lexo_rank_sqlite.py
+Created on:     18/10/26, 8:55 pm
+"""
+import random
+import sqlite3
+from functools import cmp_to_key
+
+import pytest
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+from src.lexo_rank_sqlite import LexoRankSqlite
+
+
+def ranks(n):
+    """ Sorted ranks of different lengths """
+    left, right = LexoRank.middle(), LexoRank.middle().gen_next()
+    values = []
+    for _ in range(n):
+        left = left.between(right)
+        values.append(left.value)
+    return values
+
+
+def cards(values, check=""):
+    connection = sqlite3.connect(":memory:")
+    LexoRankSqlite.register(connection)
+    connection.execute(f"CREATE TABLE cards (id INTEGER PRIMARY KEY, rank TEXT {check})")
+    shuffled = list(enumerate(values))
+    random.Random(len(values)).shuffle(shuffled)
+    connection.executemany("INSERT INTO cards VALUES (?, ?)", shuffled)
+    return connection
+
+
+def test_collation_orders_like_compare_to():
+    values = ranks(30) + ["1|000001:", "0|000000:", "0|zzzzzz:", "2|hzzzzz:"]
+    # Not canonical, the fractions end with zeros
+    values += ["0|i0000a:10", "0|i0000a:100"]
+    connection = cards(values)
+    rows = connection.execute("SELECT rank FROM cards ORDER BY rank COLLATE LEXORANK")
+    expected = sorted(
+        values, key=cmp_to_key(lambda a, b: LexoRank.parse(a).compare_to(LexoRank.parse(b)))
+    )
+    assert [row[0] for row in rows] == expected
+
+
+def test_functions_match_lexo_rank():
+    values = ranks(10)
+    connection = cards(values)
+    rows = connection.execute(
+        "SELECT rank, lexo_between(rank, LEAD(rank) OVER (ORDER BY rank COLLATE LEXORANK)),"
+        " lexo_next(rank), lexo_prev(rank), lexo_len(rank) FROM cards"
+        " ORDER BY rank COLLATE LEXORANK"
+    ).fetchall()
+    for (value, between, next_rank, prev_rank, length), right in zip(rows, values[1:] + [None]):
+        rank = LexoRank.parse(value)
+        expected = rank.gen_next() if right is None else rank.between(LexoRank.parse(right))
+        assert between == expected.value
+        assert next_rank == rank.gen_next().value
+        assert prev_rank == rank.gen_prev().value
+        assert length == len(value)
+    assert connection.execute("SELECT lexo_between(NULL, NULL)").fetchone()[0] == \
+        LexoRank.middle().value
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 1000])
+def test_rerank_keeps_the_order_with_even_ranks(batch_size):
+    values = ranks(25)
+    connection = cards(values)
+    assert LexoRankSqlite.rerank(connection, "cards", batch_size=batch_size) == 25
+    rows = connection.execute("SELECT id, rank FROM cards ORDER BY rank").fetchall()
+    assert [row[0] for row in rows] == list(range(25))
+    assert [row[1] for row in rows] == [rank.value for rank in LexoRank.initial_sequence(25)]
+
+
+def test_rerank_to_another_bucket():
+    connection = cards(ranks(5))
+    LexoRankSqlite.rerank(connection, "cards", bucket=LexoRankBucket.get_bucket_0().next())
+    rows = connection.execute("SELECT id, rank FROM cards ORDER BY rank").fetchall()
+    assert [row[0] for row in rows] == list(range(5))
+    assert all(row[1].startswith("1|") for row in rows)
+
+
+def test_rerank_rolls_back_on_error():
+    values = ranks(30)
+    # Rows after the first batches can not be moved to bucket 1
+    connection = cards(values, "CHECK (id < 20 OR rank NOT LIKE '1|%')")
+    with pytest.raises(sqlite3.IntegrityError):
+        LexoRankSqlite.rerank(
+            connection, "cards", bucket=LexoRankBucket.get_bucket_0().next(), batch_size=5
+        )
+    rows = connection.execute("SELECT rank FROM cards ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == values
+
+
+def test_rerank_rejects_bad_identifiers():
+    connection = cards(ranks(3))
+    with pytest.raises(ValueError):
+        LexoRankSqlite.rerank(connection, "cards; DROP TABLE cards")
@@ -0,0 +1,57 @@
+"""
+File:           test_lexo_rank_string.py
+Created on:     18/10/26, 8:54 pm
+"""
+import random
+
+import pytest
+
+from src.lexo_rank import LexoRank
+from src.lexo_rank_bucket import LexoRankBucket
+from src.lexo_rank_string import rank_between, rank_next, rank_prev
+
+
+def corpus():
+    """ Edge, evenly spaced and long ranks of every bucket """
+    rng = random.Random(8)
+    ranks = []
+    for bucket in LexoRankBucket.get_values():
+        low, high = LexoRank.min(bucket), LexoRank.max(bucket)
+        ranks += [low, high, low.between(high), low.gen_next(), high.gen_prev()]
+        ranks += LexoRank.initial_sequence(10, bucket)
+        left, right = low, high
+        for _ in range(80):
+            middle = left.between(right)
+            ranks.append(middle)
+            if rng.random() < 0.5:
+                left = middle
+            else:
+                right = middle
+    return sorted(set(ranks), key=LexoRank.sort_key)
+
+
+RANKS = corpus()
+
+
+def test_rank_next_and_rank_prev_match_lexo_rank():
+    for rank in RANKS:
+        assert rank_next(rank.value) == rank.gen_next().value
+        assert rank_prev(rank.value) == rank.gen_prev().value
+
+
+def test_rank_between_matches_lexo_rank():
+    rng = random.Random(9)
+    pairs = list(zip(RANKS, RANKS[1:])) + [tuple(rng.sample(RANKS, 2)) for _ in range(300)]
+    for left, right in pairs:
+        if left.bucket != right.bucket:
+            continue
+        assert rank_between(left.value, right.value) == left.between(right).value
+        assert rank_between(right.value, left.value) == right.between(left).value
+
+
+def test_rank_between_rejects_what_lexo_rank_rejects():
+    middle = LexoRank.middle()
+    with pytest.raises(ValueError):
+        rank_between(middle.value, middle.value)
+    with pytest.raises(ValueError):
+        rank_between(middle.value, middle.in_next_bucket().value)
@@ -0,0 +1,42 @@
+"""
+File:           test_lexo_ranked_list.py
+Created on:     18/10/26, 8:34 pm
+"""
+import pytest
+
+from src.lexo_numeral_system import LexoNumeralSystem
+from src.lexo_rank import LexoRank, RebalanceNeededError
+from src.lexo_ranked_list import RankedList
+
+
+class LexoNumeralSystem2(LexoNumeralSystem):
+    """ Base 2, so the 6 integer digits only hold 63 ranks """
+    DIGITS = list("01")
+
+
+def test_move_keeps_the_order():
+    ranked = RankedList.from_items("abcde")
+    ranked.move("a", 3)
+    assert list(ranked) == list("bcdae")
+    ranked.move("e", 0)
+    assert list(ranked) == list("ebcda")
+    assert [rank.value for _, rank in ranked.items()] == sorted(
+        rank.value for _, rank in ranked.items()
+    )
+
+
+def test_move_into_an_exhausted_gap_keeps_the_item():
+    system = LexoNumeralSystem2()
+    low = LexoRank.min(system=system)
+    ranks = low.between_many(LexoRank.max(system=system), 62, max_length=9)
+    ranked = RankedList(zip(range(62), ranks), max_length=64, system=system)
+    # Every rank of at most 9 characters is taken, and two more items have longer ranks
+    ranked.insert_at(10, "x")
+    ranked.insert_at(20, "y")
+    ranked.max_length = 9
+    before = list(ranked.items())
+    with pytest.raises(RebalanceNeededError):
+        ranked.move(0, 30)
+    assert list(ranked.items()) == before
+    assert ranked.index(0) == 0
+    assert ranked.rank_of(0) == before[0][1]
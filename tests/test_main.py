@@ -0,0 +1,43 @@
+"""
+File:           test_main.py
+Created on:     18/10/26, 8:31 pm
+"""
+import io
+import json
+
+from main import validate
+from src.lexo_rank import LexoRank
+
+
+def run_validate(lines):
+    out = io.StringIO()
+    status = validate(iter(lines), LexoRank.NUMERAL_SYSTEM, out, max_errors=10)
+    return status, json.loads(out.getvalue())
+
+
+def test_valid_ranks():
+    status, report = run_validate(["0|100000:", "0|hzzzzz:", "0|hzzzzz:1", "0|zzzzzz:"])
+    assert status == 0
+    assert report["errors"] == 0
+    assert report["length_histogram"] == {"9": 3, "10": 1}
+
+
+def test_non_canonical_ranks_are_invalid():
+    lines = ["0|abc", "0|i00000:0", "0|zzzzzzzzz:", "0|zzzzzz:1", "3|100000:", "0|i00000"]
+    status, report = run_validate(lines)
+    assert status == 1
+    assert report["errors"] == len(lines)
+
+
+def test_invalid_line_does_not_break_the_order_check():
+    status, report = run_validate(["0|100000:", "0|zzzzzz:1", "0|200000:", "0|200000:"])
+    assert report["errors"] == 2
+    assert report["first_errors"] == [
+        "line 2: '0|zzzzzz:1' is not a valid rank",
+        "line 4: duplicate rank 0|200000:",
+    ]
+
+
+def test_unsorted_line_is_reported_once():
+    status, report = run_validate(["0|100000:", "0|300000:", "0|200000:", "0|400000:"])
+    assert report["first_errors"] == ["line 3: 0|200000: is not sorted after 0|300000:"]